@@ -1,28 +1,12 @@
-
-import csv
 from collections import Counter
 
-file_path = "feedback - Sheet1 (1).csv"
-feedback_counter = Counter()
-errors = []
+from feedback_io import is_correction, load
+
 
-try:
-    with open(file_path, mode='r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            feedback = row.get('Matt Feedback', '').strip()
-            category = row.get('category', '').strip()
-            subject = row.get('subject', '').strip()
-            
-            if feedback:
-                feedback_counter[feedback] += 1
-                # If feedback sounds like a correction or comment
-                if feedback.lower() not in ['true', 'false', 'ok']:
-                    errors.append({
-                        'subject': subject,
-                        'current_category': category,
-                        'feedback': feedback
-                    })
+def report(rows):
+    feedback_counter = Counter(row.feedback for row in rows if row.feedback)
+    # Feedback that sounds like a correction or comment
+    errors = [row for row in rows if row.feedback and is_correction(row.feedback)]
 
     print(f"Total rows with feedback: {sum(feedback_counter.values())}")
     print("\nFeedback Frequency:")
@@ -31,7 +15,11 @@ try:
 
     print("\nDetailed Feedback Examples:")
     for err in errors[:30]:
-        print(f"Subject: {err['subject']}\nCategory: {err['current_category']}\nFeedback: {err['feedback']}\n---")
+        print(f"Subject: {err.subject}\nCategory: {err.category}\nFeedback: {err.feedback}\n---")
+
 
-except Exception as e:
-    print(f"Error: {e}")
+if __name__ == "__main__":
+    try:
+        report(load())
+    except Exception as e:
+        print(f"Error: {e}")
@@ -10,23 +10,83 @@ Options:
     --output-dir DIR  Directory for output files (default: output/)
     --format FMT      Output format: timeline, csv, json, all (default: all)
     --dry-run         Show stats without writing files
+    --workers N       Processes for parsing/classifying the mbox (default: CPU count)
+    --no-cache        With --dry-run, recompute even if cached results match
 """
 
 import argparse
+import hashlib
+import os
+import pickle
 import sys
 from pathlib import Path
 
-from travel_itinerary.config import DEFAULT_TRAVELER_NAME, MBOX_PATH, OUTPUT_DIR
-from travel_itinerary.pipeline import run_pipeline
-from travel_itinerary.output import (
-    format_timeline,
-    visits_to_csv,
-    events_to_csv,
-    to_json,
-    format_global_entry_html,
-    format_travel_map_html,
+from travel_itinerary.config import (
+    DEFAULT_TRAVELER_NAME,
+    EXTRACTION_CACHE_PATH,
+    MBOX_PATH,
+    OUTPUT_DIR,
 )
 
+# Everything whose code shapes the pipeline results (the legacy classifier included)
+_PIPELINE_SOURCES = Path(__file__).resolve().parent
+
+
+def _code_fingerprint() -> str:
+    """Hash of the pipeline sources, so results cached by older code never match."""
+    h = hashlib.sha1()
+    paths = sorted((_PIPELINE_SOURCES / "travel_itinerary").rglob("*.py"))
+    for path in paths + [_PIPELINE_SOURCES / "travel_sorter.py"]:
+        h.update(path.read_bytes())
+    return h.hexdigest()
+
+
+def _pipeline_cache_key(args) -> str:
+    """Hash everything that feeds run_pipeline: code, inputs, options and the LLM cache."""
+    parts = [
+        _code_fingerprint(),
+        str(Path(args.mbox).resolve()),
+        args.traveler_name,
+        str(args.extract_all),
+    ]
+    for path in (Path(args.mbox), EXTRACTION_CACHE_PATH):
+        try:
+            st = path.stat()
+            parts += [str(st.st_mtime_ns), str(st.st_size)]
+        except OSError:
+            parts.append("missing")
+    return hashlib.sha1("|".join(parts).encode("utf-8")).hexdigest()
+
+
+def _load_cached_results(path: Path, key: str):
+    """Return cached (visits, gaps, events) if they were built from the same inputs.
+
+    Unpickling runs arbitrary code, so only a file owned by the current user
+    and not writable by anyone else is loaded.
+    """
+    try:
+        st = path.stat()
+        if st.st_mode & 0o022 or (hasattr(os, "getuid") and st.st_uid != os.getuid()):
+            return None
+        with open(path, "rb") as f:
+            cached = pickle.load(f)
+        if not isinstance(cached, dict) or cached.get("key") != key:
+            return None
+        return cached["results"]
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError, KeyError):
+        return None
+
+
+def _save_cached_results(path: Path, key: str, results):
+    path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+    # Written to a fresh private file and moved into place, so the result is
+    # never group/world-writable even if an older copy was
+    tmp = path.with_suffix(".tmp")
+    tmp.unlink(missing_ok=True)
+    with open(os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600), "wb") as f:
+        pickle.dump({"key": key, "results": results}, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, path)
+
 
 def main():
     parser = argparse.ArgumentParser(
@@ -64,17 +124,49 @@ def main():
         default=DEFAULT_TRAVELER_NAME,
         help=f"Filter to trips for this traveler (default: {DEFAULT_TRAVELER_NAME})",
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Processes used to parse and classify the mbox (default: CPU count)",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="With --dry-run, recompute pipeline results instead of reusing a cached copy",
+    )
     args = parser.parse_args()
 
     output_dir = Path(args.output_dir)
 
-    # Run the pipeline
-    visits, gaps, events = run_pipeline(
-        mbox_path=args.mbox,
-        skip_classify=args.extract_all,
-        verbose=True,
-        traveler_name=args.traveler_name,
-    )
+    # Repeated dry runs reuse the last results when the mbox, extraction cache
+    # and options are unchanged
+    cache_path = output_dir / ".cache" / "pipeline.pkl"
+    use_cache = args.dry_run and not args.no_cache
+    results = _load_cached_results(cache_path, _pipeline_cache_key(args)) if use_cache else None
+
+    if results is not None:
+        visits, gaps, events = results
+        print(f"Using cached pipeline results: {cache_path}", file=sys.stderr)
+    else:
+        # Imported after argument parsing so --help doesn't load the LLM client,
+        # the legacy classifier and BeautifulSoup
+        from travel_itinerary.pipeline import run_pipeline
+
+        # Run the pipeline
+        visits, gaps, events, errors = run_pipeline(
+            mbox_path=args.mbox,
+            skip_classify=args.extract_all,
+            verbose=True,
+            traveler_name=args.traveler_name,
+            workers=args.workers,
+        )
+        if errors:
+            # Partial results would hide the failed emails from every later dry run
+            print(f"Not caching results: {errors} extractions failed", file=sys.stderr)
+        elif use_cache:
+            # Keyed after the run, which may have written new extractions to the LLM cache
+            _save_cached_results(cache_path, _pipeline_cache_key(args), (visits, gaps, events))
 
     if args.dry_run:
         print(f"\nDry run complete. {len(visits)} visits, {len(gaps)} gaps, {len(events)} events.")
@@ -84,6 +176,7 @@ def main():
     output_dir.mkdir(parents=True, exist_ok=True)
 
     if args.format in ("timeline", "all"):
+        from travel_itinerary.output import format_timeline
         timeline_text = format_timeline(visits, gaps)
         timeline_path = output_dir / "itinerary.txt"
         timeline_path.write_text(timeline_text, encoding="utf-8")
@@ -92,6 +185,7 @@ def main():
         print(timeline_text)
 
     if args.format in ("csv", "all"):
+        from travel_itinerary.output import events_to_csv, visits_to_csv
         visits_path = output_dir / "city_visits.csv"
         events_path = output_dir / "travel_events.csv"
         visits_to_csv(visits, visits_path)
@@ -99,16 +193,19 @@ def main():
         print(f"CSV written to: {visits_path}, {events_path}")
 
     if args.format in ("json", "all"):
+        from travel_itinerary.output import to_json
         json_path = output_dir / "itinerary.json"
         to_json(visits, gaps, json_path)
         print(f"JSON written to: {json_path}")
 
     if args.format in ("global-entry", "all"):
+        from travel_itinerary.output import format_global_entry_html
         ge_path = output_dir / "global_entry.html"
         format_global_entry_html(visits, ge_path)
         print(f"Global Entry report written to: {ge_path}")
 
     if args.format in ("map", "all"):
+        from travel_itinerary.output import format_travel_map_html
         map_path = output_dir / "travel_map.html"
         format_travel_map_html(visits, map_path)
         print(f"Travel map written to: {map_path}")
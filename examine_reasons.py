@@ -1,25 +1,25 @@
+from itertools import islice
 
-import csv
-from collections import Counter
+from feedback_io import load
 
-file_path = "feedback - Sheet1 (1).csv"
 
-print("Examples of Misclassified Flight Marketing:")
-print("-" * 50)
-with open(file_path, mode='r', encoding='utf-8') as f:
-    reader = csv.DictReader(f)
-    count = 0
-    for row in reader:
-        category = row.get('category', '').strip()
-        feedback = row.get('Matt Feedback', '').strip().lower()
-        reasons = row.get('reasons', '').strip()
-        subject = row.get('subject', '').strip()
-        
-        if category == 'FLIGHT_CONFIRMATION' and ('marketing' in feedback or 'not confirmation' in feedback):
-            print(f"Subject: {subject}")
-            print(f"Feedback: {feedback}")
-            print(f"Reasons: {reasons}")
-            print("-" * 20)
-            count += 1
-            if count >= 10:
-                break
+def _is_flight_marketing(row):
+    # Cheap category compare first; only lowercase feedback for flight rows
+    if row.category != 'FLIGHT_CONFIRMATION':
+        return False
+    feedback = row.feedback.lower()
+    return 'marketing' in feedback or 'not confirmation' in feedback
+
+
+def report(rows):
+    print("Examples of Misclassified Flight Marketing:")
+    print("-" * 50)
+    for row in islice(filter(_is_flight_marketing, rows), 10):
+        print(f"Subject: {row.subject}")
+        print(f"Feedback: {row.feedback.lower()}")
+        print(f"Reasons: {row.reasons}")
+        print("-" * 20)
+
+
+if __name__ == "__main__":
+    report(load())
@@ -0,0 +1,67 @@
+"""Shared loader for the feedback spreadsheet read by the analysis scripts.
+
+Running this module prints all three reports from a single parse:
+
+    python feedback_io.py
+"""
+
+import csv
+from functools import lru_cache
+from operator import itemgetter
+from typing import NamedTuple, Tuple
+
+FILE_PATH = "feedback - Sheet1 (1).csv"
+
+# Bare verdicts, as opposed to a written correction or comment
+VERDICTS = frozenset(('true', 'false', 'ok'))
+_MAX_VERDICT_LEN = max(map(len, VERDICTS))
+
+
+class FeedbackRow(NamedTuple):
+    subject: str
+    category: str
+    feedback: str
+    reasons: str
+
+
+# Spreadsheet column backing each FeedbackRow field, in field order
+_COLUMNS = ('subject', 'category', 'Matt Feedback', 'reasons')
+
+
+def is_correction(feedback):
+    """True if non-empty feedback is a comment rather than a bare verdict."""
+    # Longer strings can't be a verdict, so skip lowercasing them
+    return len(feedback) > _MAX_VERDICT_LEN or feedback.lower() not in VERDICTS
+
+
+@lru_cache(maxsize=None)
+def load(file_path: str = FILE_PATH) -> Tuple[FeedbackRow, ...]:
+    """Parse the CSV once into stripped rows; repeat calls reuse the result."""
+    with open(file_path, mode='r', encoding='utf-8', newline='') as f:
+        reader = csv.reader(f)
+        header = next(reader, [])
+        columns = {name: i for i, name in enumerate(header)}
+        # Missing columns read a blank cell padded on past the header
+        indices = [columns.get(name, len(header)) for name in _COLUMNS]
+        pick = itemgetter(*indices)
+        width = max(indices) + 1
+
+        rows = []
+        for row in reader:
+            if len(row) < width:
+                row.extend([''] * (width - len(row)))
+            rows.append(FeedbackRow._make(map(str.strip, pick(row))))
+        return tuple(rows)
+
+
+if __name__ == "__main__":
+    import analyze_feedback
+    import analyze_feedback_v2
+    import examine_reasons
+
+    rows = load()
+    analyze_feedback.report(rows)
+    print()
+    analyze_feedback_v2.report(rows)
+    print()
+    examine_reasons.report(rows)
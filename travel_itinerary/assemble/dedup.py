@@ -1,35 +1,25 @@
 """Deduplicate travel events — same booking generates 5-15 emails."""
 
 from collections import defaultdict
-from datetime import timedelta
-from typing import List, Optional
+from typing import List, Optional, Tuple
 
 from travel_itinerary.config import DEDUP_DATE_WINDOW_DAYS
-from travel_itinerary.models import TravelEvent
+from travel_itinerary.models import EventType, TravelEvent
 
 
 def _richness_score(event: TravelEvent) -> int:
     """Count non-null useful fields — higher = more complete extraction."""
-    score = 0
-    if event.start_date:
-        score += 2
-    if event.end_date:
-        score += 2
-    if event.origin and event.origin.city:
-        score += 1
-    if event.destination and event.destination.city:
-        score += 1
-    if event.confirmation_number:
-        score += 1
-    if event.provider:
-        score += 1
-    if event.property_name:
-        score += 1
-    if event.activity_name:
-        score += 1
-    if event.legs:
-        score += len(event.legs)
-    return score
+    return (
+        2 * bool(event.start_date)
+        + 2 * bool(event.end_date)
+        + bool(event.origin and event.origin.city)
+        + bool(event.destination and event.destination.city)
+        + bool(event.confirmation_number)
+        + bool(event.provider)
+        + bool(event.property_name)
+        + bool(event.activity_name)
+        + len(event.legs or ())
+    )
 
 
 def _merge_pair(primary: TravelEvent, secondary: TravelEvent) -> TravelEvent:
@@ -59,33 +49,80 @@ def _merge_pair(primary: TravelEvent, secondary: TravelEvent) -> TravelEvent:
     return primary
 
 
-def _events_match_by_date(a: TravelEvent, b: TravelEvent) -> bool:
+def _merge_group(group: List[TravelEvent]) -> TravelEvent:
+    """Merge a cluster of duplicates into its richest event.
+
+    Secondaries are merged richest-first, since _merge_pair keeps the first
+    value it sees for each missing field; only singletons skip the sort.
+    """
+    if len(group) == 1:
+        return group[0]
+    group.sort(key=_richness_score, reverse=True)
+    primary = group[0]
+    for secondary in group[1:]:
+        primary = _merge_pair(primary, secondary)
+    return primary
+
+
+# (event_type, date ordinal or None, lowercased destination city, lowercased provider)
+_MatchKey = Tuple[EventType, Optional[int], str, str]
+
+
+def _match_key(ev: TravelEvent) -> _MatchKey:
+    """Fields compared when matching events that lack a confirmation number."""
+    ev_date = ev.start_date or ev.end_date
+    return (
+        ev.event_type,
+        ev_date.toordinal() if ev_date else None,
+        (ev.destination.city if ev.destination else "").lower(),
+        ev.provider.lower() if ev.provider else "",
+    )
+
+
+def _events_match_by_date(a: _MatchKey, b: _MatchKey) -> bool:
     """Check if two events without confirmation numbers are likely the same booking."""
-    if a.event_type != b.event_type:
+    a_type, a_day, a_dest, a_provider = a
+    b_type, b_day, b_dest, b_provider = b
+    if a_type != b_type:
         return False
 
     # Need at least one date on each to compare
-    a_date = a.start_date or a.end_date
-    b_date = b.start_date or b.end_date
-    if not a_date or not b_date:
+    if a_day is None or b_day is None:
         return False
 
-    if abs((a_date - b_date).days) > DEDUP_DATE_WINDOW_DAYS:
+    if abs(a_day - b_day) > DEDUP_DATE_WINDOW_DAYS:
         return False
 
     # Same destination city?
-    a_dest = (a.destination.city if a.destination else "").lower()
-    b_dest = (b.destination.city if b.destination else "").lower()
     if a_dest and b_dest and a_dest == b_dest:
         return True
 
     # Same provider?
-    if a.provider and b.provider and a.provider.lower() == b.provider.lower():
+    if a_provider and b_provider and a_provider == b_provider:
         return True
 
     return False
 
 
+# Width of the index's day buckets: two events within the match window always
+# fall in the same or adjacent buckets
+_DAY_BUCKET = DEDUP_DATE_WINDOW_DAYS + 1
+
+
+def _index_keys(key: _MatchKey) -> List[tuple]:
+    """Index keys for an event: its type, destination city or provider, and day bucket."""
+    ev_type, day, dest, provider = key
+    if day is None:
+        return []
+    bucket = day // _DAY_BUCKET
+    keys = []
+    if dest:
+        keys.append((ev_type, "city", dest, bucket))
+    if provider:
+        keys.append((ev_type, "provider", provider, bucket))
+    return keys
+
+
 def deduplicate(events: List[TravelEvent]) -> List[TravelEvent]:
     """Deduplicate events. Returns a new list with merged unique events."""
     if not events:
@@ -105,31 +142,37 @@ def deduplicate(events: List[TravelEvent]) -> List[TravelEvent]:
     merged: List[TravelEvent] = []
 
     # Merge within each confirmation group
-    for conf, group in by_conf.items():
-        group.sort(key=_richness_score, reverse=True)
-        primary = group[0]
-        for secondary in group[1:]:
-            primary = _merge_pair(primary, secondary)
-        merged.append(primary)
-
-    # Phase 2: For events without confirmation numbers, group by type+city+date window
-    used = set()
+    for group in by_conf.values():
+        merged.append(_merge_group(group))
+
+    # Phase 2: For events without confirmation numbers, group by type+city+date window.
+    # Events can only match if they share a type and a city or provider and sit in
+    # the same or a neighboring day bucket, so look candidates up by hashed key.
+    match_keys = [_match_key(ev) for ev in no_conf]
+    keys_by_event = [_index_keys(key) for key in match_keys]
+    index: defaultdict[tuple, List[int]] = defaultdict(list)
+    for j, keys in enumerate(keys_by_event):
+        for key in keys:
+            index[key].append(j)
+
+    used = bytearray(len(no_conf))  # 1 = already placed in a group
     for i, ev_a in enumerate(no_conf):
-        if i in used:
+        if used[i]:
             continue
+        candidates = set()
+        for *shared, bucket in keys_by_event[i]:
+            for neighbor in (bucket - 1, bucket, bucket + 1):
+                candidates.update(j for j in index.get((*shared, neighbor), ()) if j > i)
+
         group = [ev_a]
-        for j, ev_b in enumerate(no_conf[i + 1:], start=i + 1):
-            if j in used:
+        for j in sorted(candidates):
+            if used[j]:
                 continue
-            if _events_match_by_date(ev_a, ev_b):
-                group.append(ev_b)
-                used.add(j)
-        used.add(i)
-
-        group.sort(key=_richness_score, reverse=True)
-        primary = group[0]
-        for secondary in group[1:]:
-            primary = _merge_pair(primary, secondary)
-        merged.append(primary)
+            if _events_match_by_date(match_keys[i], match_keys[j]):
+                group.append(no_conf[j])
+                used[j] = 1
+        used[i] = 1
+
+        merged.append(_merge_group(group))
 
     return merged
@@ -1,7 +1,10 @@
 """Core signal-based timeline assembly: TravelEvents → CityVisits."""
 
-from datetime import date, timedelta
-from typing import List, Optional
+import sys
+from datetime import date
+from functools import lru_cache
+from operator import itemgetter
+from typing import Dict, Iterable, List, Optional, Tuple
 
 from travel_itinerary.models import (
     Accommodation,
@@ -18,26 +21,32 @@ from travel_itinerary.models import (
 # Step 1: Convert TravelEvents into CitySignals
 # ---------------------------------------------------------------------------
 
-def _signals_from_flight(ev: TravelEvent) -> List[CitySignal]:
-    signals = []
+@lru_cache(maxsize=4096)
+def _city_key(city: str) -> str:
+    """Lowercased, interned city name, so same-city checks are an identity test."""
+    return sys.intern(city.lower())
 
+
+def _signals_from_flight(ev: TravelEvent, out: List[CitySignal]) -> None:
     if ev.legs:
         for leg in ev.legs:
             dep_date = leg.departure_date or ev.start_date
             arr_date = leg.arrival_date or leg.departure_date or ev.start_date
             if leg.origin and leg.origin.city and dep_date:
-                signals.append(CitySignal(
+                out.append(CitySignal(
                     signal_type=SignalType.EXIT,
                     city=leg.origin.city,
+                    city_key=_city_key(leg.origin.city),
                     dt=dep_date,
                     strength=1.0,
                     source_event=ev,
                     method="flight_departure",
                 ))
             if leg.destination and leg.destination.city and arr_date:
-                signals.append(CitySignal(
+                out.append(CitySignal(
                     signal_type=SignalType.ENTER,
                     city=leg.destination.city,
+                    city_key=_city_key(leg.destination.city),
                     dt=arr_date,
                     strength=1.0,
                     source_event=ev,
@@ -45,9 +54,10 @@ def _signals_from_flight(ev: TravelEvent) -> List[CitySignal]:
                 ))
     else:
         if ev.origin and ev.origin.city and ev.start_date:
-            signals.append(CitySignal(
+            out.append(CitySignal(
                 signal_type=SignalType.EXIT,
                 city=ev.origin.city,
+                city_key=_city_key(ev.origin.city),
                 dt=ev.start_date,
                 strength=1.0,
                 source_event=ev,
@@ -56,37 +66,38 @@ def _signals_from_flight(ev: TravelEvent) -> List[CitySignal]:
         if ev.destination and ev.destination.city:
             arr_date = ev.end_date or ev.start_date
             if arr_date:
-                signals.append(CitySignal(
+                out.append(CitySignal(
                     signal_type=SignalType.ENTER,
                     city=ev.destination.city,
+                    city_key=_city_key(ev.destination.city),
                     dt=arr_date,
                     strength=1.0,
                     source_event=ev,
                     method="flight_arrival",
                 ))
 
-    return signals
-
 
-def _signals_from_hotel(ev: TravelEvent) -> List[CitySignal]:
-    signals = []
+def _signals_from_hotel(ev: TravelEvent, out: List[CitySignal]) -> None:
     city = ev.destination.city if ev.destination else ""
     if not city:
-        return signals
+        return
+    city_key = _city_key(city)
 
     if ev.start_date:
-        signals.append(CitySignal(
+        out.append(CitySignal(
             signal_type=SignalType.ENTER,
             city=city,
+            city_key=city_key,
             dt=ev.start_date,
             strength=0.8,
             source_event=ev,
             method="hotel_checkin",
         ))
     if ev.end_date:
-        signals.append(CitySignal(
+        out.append(CitySignal(
             signal_type=SignalType.EXIT,
             city=city,
+            city_key=city_key,
             dt=ev.end_date,
             strength=0.8,
             source_event=ev,
@@ -94,36 +105,37 @@ def _signals_from_hotel(ev: TravelEvent) -> List[CitySignal]:
         ))
     # PRESENT for each night
     if ev.start_date and ev.end_date:
-        d = ev.start_date
-        while d < ev.end_date:
-            signals.append(CitySignal(
-                signal_type=SignalType.PRESENT,
+        present, from_ordinal = SignalType.PRESENT, date.fromordinal
+        out.extend(
+            CitySignal(
+                signal_type=present,
                 city=city,
-                dt=d,
+                city_key=city_key,
+                dt=from_ordinal(day),
                 strength=0.9,
                 source_event=ev,
                 method="hotel_stay",
-            ))
-            d += timedelta(days=1)
+            )
+            for day in range(ev.start_date.toordinal(), ev.end_date.toordinal())
+        )
     elif ev.start_date:
-        signals.append(CitySignal(
+        out.append(CitySignal(
             signal_type=SignalType.PRESENT,
             city=city,
+            city_key=city_key,
             dt=ev.start_date,
             strength=0.9,
             source_event=ev,
             method="hotel_stay",
         ))
 
-    return signals
-
 
-def _signals_from_rail_bus(ev: TravelEvent) -> List[CitySignal]:
-    signals = []
+def _signals_from_rail_bus(ev: TravelEvent, out: List[CitySignal]) -> None:
     if ev.origin and ev.origin.city and ev.start_date:
-        signals.append(CitySignal(
+        out.append(CitySignal(
             signal_type=SignalType.EXIT,
             city=ev.origin.city,
+            city_key=_city_key(ev.origin.city),
             dt=ev.start_date,
             strength=1.0,
             source_event=ev,
@@ -132,69 +144,72 @@ def _signals_from_rail_bus(ev: TravelEvent) -> List[CitySignal]:
     if ev.destination and ev.destination.city:
         arr_date = ev.end_date or ev.start_date
         if arr_date:
-            signals.append(CitySignal(
+            out.append(CitySignal(
                 signal_type=SignalType.ENTER,
                 city=ev.destination.city,
+                city_key=_city_key(ev.destination.city),
                 dt=arr_date,
                 strength=1.0,
                 source_event=ev,
                 method=f"{ev.event_type.value}_arrival",
             ))
-    return signals
 
 
-def _signals_from_car_rental(ev: TravelEvent) -> List[CitySignal]:
-    signals = []
+def _signals_from_car_rental(ev: TravelEvent, out: List[CitySignal]) -> None:
     if ev.origin and ev.origin.city and ev.start_date:
-        signals.append(CitySignal(
+        out.append(CitySignal(
             signal_type=SignalType.PRESENT,
             city=ev.origin.city,
+            city_key=_city_key(ev.origin.city),
             dt=ev.start_date,
             strength=0.5,
             source_event=ev,
             method="car_rental_pickup",
         ))
     if ev.destination and ev.destination.city and ev.end_date:
-        signals.append(CitySignal(
+        out.append(CitySignal(
             signal_type=SignalType.PRESENT,
             city=ev.destination.city,
+            city_key=_city_key(ev.destination.city),
             dt=ev.end_date,
             strength=0.5,
             source_event=ev,
             method="car_rental_return",
         ))
-    return signals
 
 
-def _signals_from_tour(ev: TravelEvent) -> List[CitySignal]:
-    signals = []
+def _signals_from_tour(ev: TravelEvent, out: List[CitySignal]) -> None:
     city = ev.destination.city if ev.destination else ""
     if city and ev.start_date:
-        signals.append(CitySignal(
+        out.append(CitySignal(
             signal_type=SignalType.PRESENT,
             city=city,
+            city_key=_city_key(city),
             dt=ev.start_date,
             strength=0.7,
             source_event=ev,
             method="tour_activity",
         ))
-    return signals
+
+
+_SIGNAL_HANDLERS = {
+    EventType.FLIGHT: _signals_from_flight,
+    EventType.HOTEL: _signals_from_hotel,
+    EventType.RAIL: _signals_from_rail_bus,
+    EventType.BUS_FERRY: _signals_from_rail_bus,
+    EventType.CAR_RENTAL: _signals_from_car_rental,
+    EventType.TOUR: _signals_from_tour,
+}
 
 
 def events_to_signals(events: List[TravelEvent]) -> List[CitySignal]:
     """Convert all TravelEvents into flat list of CitySignals."""
-    signals = []
+    signals: List[CitySignal] = []
+    handlers = _SIGNAL_HANDLERS
     for ev in events:
-        if ev.event_type == EventType.FLIGHT:
-            signals.extend(_signals_from_flight(ev))
-        elif ev.event_type == EventType.HOTEL:
-            signals.extend(_signals_from_hotel(ev))
-        elif ev.event_type in (EventType.RAIL, EventType.BUS_FERRY):
-            signals.extend(_signals_from_rail_bus(ev))
-        elif ev.event_type == EventType.CAR_RENTAL:
-            signals.extend(_signals_from_car_rental(ev))
-        elif ev.event_type == EventType.TOUR:
-            signals.extend(_signals_from_tour(ev))
+        handler = handlers.get(ev.event_type)
+        if handler is not None:
+            handler(ev, signals)
     return signals
 
 
@@ -206,132 +221,179 @@ _SIGNAL_ORDER = {SignalType.EXIT: 0, SignalType.PRESENT: 1, SignalType.ENTER: 2}
 
 
 def sort_signals(signals: List[CitySignal]) -> List[CitySignal]:
-    return sorted(signals, key=lambda s: (s.dt, _SIGNAL_ORDER[s.signal_type]))
+    # Pack (date, order) into one int: ordinal in the high bits, the 2-bit
+    # order below. Timsort compares homogeneous small ints on a fast path,
+    # unlike tuples of dates. Key-only sorting keeps the sort stable.
+    order = _SIGNAL_ORDER
+    keyed = [((s.dt.toordinal() << 2) | order[s.signal_type], s) for s in signals]
+    keyed.sort(key=itemgetter(0))
+    return [s for _, s in keyed]
 
 
 # ---------------------------------------------------------------------------
 # Step 3: Walk signals to build CityVisits
 # ---------------------------------------------------------------------------
 
-def _collect_accommodations(events: List[TravelEvent]) -> List[Accommodation]:
-    accs = []
-    for ev in events:
-        if ev.event_type == EventType.HOTEL and (ev.property_name or ev.provider):
-            accs.append(Accommodation(
-                name=ev.property_name or ev.provider or "Unknown hotel",
-                provider=ev.provider,
-                check_in=ev.start_date,
-                check_out=ev.end_date,
-                confirmation=ev.confirmation_number,
-            ))
-    return accs
+def _add_accommodation(ev: TravelEvent, visit: CityVisit) -> None:
+    if ev.property_name or ev.provider:
+        visit.accommodations.append(Accommodation(
+            name=ev.property_name or ev.provider or "Unknown hotel",
+            provider=ev.provider,
+            check_in=ev.start_date,
+            check_out=ev.end_date,
+            confirmation=ev.confirmation_number,
+        ))
 
 
-def _collect_activities(events: List[TravelEvent]) -> List[Activity]:
-    acts = []
+def _add_activity(ev: TravelEvent, visit: CityVisit) -> None:
+    if ev.activity_name:
+        visit.activities.append(Activity(
+            name=ev.activity_name,
+            provider=ev.provider,
+            dt=ev.start_date,
+            confirmation=ev.confirmation_number,
+        ))
+
+
+_EXTRA_HANDLERS = {
+    EventType.HOTEL: _add_accommodation,
+    EventType.TOUR: _add_activity,
+}
+
+
+# Supporting events bucketed by (source email, type, start date). TravelEvent
+# isn't hashable, but equal events always share these fields, so an
+# equality check within the bucket finds the same duplicates a scan of the
+# whole list would.
+_EventIndex = Dict[Tuple[str, EventType, Optional[date]], List[TravelEvent]]
+
+
+def _index_events(events: Iterable[TravelEvent]) -> _EventIndex:
+    index: _EventIndex = {}
     for ev in events:
-        if ev.event_type == EventType.TOUR and ev.activity_name:
-            acts.append(Activity(
-                name=ev.activity_name,
-                provider=ev.provider,
-                dt=ev.start_date,
-                confirmation=ev.confirmation_number,
-            ))
-    return acts
+        index.setdefault((ev.source_email_id, ev.event_type, ev.start_date), []).append(ev)
+    return index
+
+
+def _add_supporting_event(visit: CityVisit, index: _EventIndex, ev: TravelEvent) -> None:
+    """Append ev to the visit's supporting events unless an equal event is already there."""
+    bucket = index.setdefault((ev.source_email_id, ev.event_type, ev.start_date), [])
+    if ev not in bucket:
+        bucket.append(ev)
+        visit.supporting_events.append(ev)
+
 
+def assemble_visits(signals: List[CitySignal], score: bool = True) -> List[CityVisit]:
+    """Walk through sorted signals and produce a list of CityVisits.
 
-def assemble_visits(signals: List[CitySignal]) -> List[CityVisit]:
-    """Walk through sorted signals and produce a list of CityVisits."""
+    Pass score=False when the visits go straight into
+    merge_consecutive_visits, which scores every visit it returns.
+    """
     if not signals:
         return []
 
     signals = sort_signals(signals)
     visits: List[CityVisit] = []
     current: Optional[CityVisit] = None
+    current_key = ""  # city key of the open visit
+    current_events: _EventIndex = {}  # the open visit's supporting events
+
+    # Locals for the hot loop: enum members and each signal's fields are read once
+    ENTER, EXIT, PRESENT = SignalType.ENTER, SignalType.EXIT, SignalType.PRESENT
 
     for sig in signals:
-        if sig.signal_type == SignalType.ENTER:
+        signal_type, city, dt, method, source = (
+            sig.signal_type, sig.city, sig.dt, sig.method, sig.source_event
+        )
+        sig_key = sig.city_key or _city_key(city)
+        if signal_type is ENTER:
             # Close previous visit if open
             if current is not None:
                 if not current.exit_date:
-                    current.exit_date = sig.dt
+                    current.exit_date = dt
                     current.exit_method = "inferred_from_next_arrival"
-                    current.notes.append(f"Exit inferred from arrival in {sig.city}")
+                    current.notes.append(f"Exit inferred from arrival in {city}")
                 visits.append(current)
 
             # Open new visit
             current = CityVisit(
-                city=sig.city,
-                enter_date=sig.dt,
-                enter_method=sig.method,
+                city=city,
+                enter_date=dt,
+                enter_method=method,
             )
-            if sig.source_event:
-                current.supporting_events.append(sig.source_event)
+            current_key = sig_key
+            current_events = _index_events((source,) if source else ())
+            if source:
+                current.supporting_events.append(source)
 
-        elif sig.signal_type == SignalType.EXIT:
-            if current is not None and current.city.lower() == sig.city.lower():
+        elif signal_type is EXIT:
+            if current is not None and current_key is sig_key:
                 # Explicit exit from current city
-                current.exit_date = sig.dt
-                current.exit_method = sig.method
-                if sig.source_event:
-                    current.supporting_events.append(sig.source_event)
+                current.exit_date = dt
+                current.exit_method = method
+                if source:
+                    current.supporting_events.append(source)
                 visits.append(current)
                 current = None
             elif current is not None:
                 # EXIT from a different city — close current, record departure-only
                 if not current.exit_date:
-                    current.exit_date = sig.dt
+                    current.exit_date = dt
                     current.exit_method = "inferred_unknown"
-                    current.notes.append(f"Closed: EXIT signal from {sig.city}")
+                    current.notes.append(f"Closed: EXIT signal from {city}")
                 visits.append(current)
                 current = None
                 # Don't open a new visit — we just know they left this city
             else:
                 # No current visit open — this is a departure without prior arrival
                 dep_visit = CityVisit(
-                    city=sig.city,
+                    city=city,
                     enter_date=None,
                     enter_method="inferred",
-                    exit_date=sig.dt,
-                    exit_method=sig.method,
+                    exit_date=dt,
+                    exit_method=method,
                     notes=["Departure only — no arrival evidence"],
                 )
-                if sig.source_event:
-                    dep_visit.supporting_events.append(sig.source_event)
+                if source:
+                    dep_visit.supporting_events.append(source)
                 visits.append(dep_visit)
 
-        elif sig.signal_type == SignalType.PRESENT:
-            if current is not None and current.city.lower() == sig.city.lower():
+        elif signal_type is PRESENT:
+            if current is not None and current_key is sig_key:
                 # Strengthen existing visit
-                if sig.source_event and sig.source_event not in current.supporting_events:
-                    current.supporting_events.append(sig.source_event)
+                if source:
+                    _add_supporting_event(current, current_events, source)
             elif current is not None:
                 # PRESENT in a different city — don't override strong visit with weak signal
                 if sig.strength >= 0.7:
                     # Strong enough to close current and start new
                     if not current.exit_date:
-                        current.exit_date = sig.dt
+                        current.exit_date = dt
                         current.exit_method = "inferred_from_presence_elsewhere"
-                        current.notes.append(f"Exit inferred from presence in {sig.city}")
+                        current.notes.append(f"Exit inferred from presence in {city}")
                     visits.append(current)
                     current = CityVisit(
-                        city=sig.city,
-                        enter_date=sig.dt,
-                        enter_method=sig.method,
+                        city=city,
+                        enter_date=dt,
+                        enter_method=method,
                     )
-                    if sig.source_event:
-                        current.supporting_events.append(sig.source_event)
+                    current_key = sig_key
+                    current_events = _index_events((source,) if source else ())
+                    if source:
+                        current.supporting_events.append(source)
                 # Weak signals (car rental) — just ignore
             else:
                 # No current visit — start a weak one
                 current = CityVisit(
-                    city=sig.city,
-                    enter_date=sig.dt,
-                    enter_method=sig.method,
+                    city=city,
+                    enter_date=dt,
+                    enter_method=method,
                     notes=["Started from PRESENT signal only"],
                 )
-                if sig.source_event:
-                    current.supporting_events.append(sig.source_event)
+                current_key = sig_key
+                current_events = _index_events((source,) if source else ())
+                if source:
+                    current.supporting_events.append(source)
 
     # Close any remaining visit
     if current is not None:
@@ -340,10 +402,14 @@ def assemble_visits(signals: List[CitySignal]) -> List[CityVisit]:
         visits.append(current)
 
     # Post-process: attach accommodations and activities, score confidence
+    handlers = _EXTRA_HANDLERS
     for visit in visits:
-        visit.accommodations = _collect_accommodations(visit.supporting_events)
-        visit.activities = _collect_activities(visit.supporting_events)
-        visit.confidence = _score_confidence(visit)
+        for ev in visit.supporting_events:
+            handler = handlers.get(ev.event_type)
+            if handler is not None:
+                handler(ev, visit)
+        if score:
+            visit.confidence = _score_confidence(visit)
 
     return visits
 
@@ -394,9 +460,12 @@ def merge_consecutive_visits(visits: List[CityVisit]) -> List[CityVisit]:
 
     merged: List[CityVisit] = []
     current = visits[0]
+    current_key = _city_key(current.city)
+    current_events = _index_events(current.supporting_events)
 
     for nxt in visits[1:]:
-        same_city = current.city.lower() == nxt.city.lower()
+        nxt_key = _city_key(nxt.city)
+        same_city = current_key is nxt_key
 
         # Also merge if gap between them is ≤ 1 day
         gap_days = None
@@ -424,8 +493,7 @@ def merge_consecutive_visits(visits: List[CityVisit]) -> List[CityVisit]:
                 current.exit_method = nxt.exit_method
             # Merge supporting data
             for ev in nxt.supporting_events:
-                if ev not in current.supporting_events:
-                    current.supporting_events.append(ev)
+                _add_supporting_event(current, current_events, ev)
             current.accommodations.extend(nxt.accommodations)
             current.activities.extend(nxt.activities)
             # Don't carry over noise notes from sub-visits
@@ -437,6 +505,8 @@ def merge_consecutive_visits(visits: List[CityVisit]) -> List[CityVisit]:
             current.notes = [n for n in current.notes if "Started from PRESENT" not in n]
             merged.append(current)
             current = nxt
+            current_key = nxt_key
+            current_events = _index_events(current.supporting_events)
 
     # Finalize last
     current.accommodations = _dedup_accommodations(current.accommodations)
@@ -450,6 +520,6 @@ def merge_consecutive_visits(visits: List[CityVisit]) -> List[CityVisit]:
 def build_timeline(events: List[TravelEvent]) -> List[CityVisit]:
     """Full pipeline: events → signals → sorted → assembled → merged visits."""
     signals = events_to_signals(events)
-    visits = assemble_visits(signals)
+    visits = assemble_visits(signals, score=False)
     visits = merge_consecutive_visits(visits)
     return visits
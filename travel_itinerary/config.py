@@ -16,13 +16,14 @@ GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY", "")
 LLM_BACKEND = os.getenv("LLM_BACKEND", "gemini" if GOOGLE_API_KEY else "openai")
 LLM_MODEL_PRIMARY = os.getenv("LLM_MODEL_PRIMARY", "gemini-2.5-flash-preview-05-20" if LLM_BACKEND == "gemini" else "gpt-4o-mini")
 LLM_MODEL_FALLBACK = os.getenv("LLM_MODEL_FALLBACK", "gemini-2.0-flash" if LLM_BACKEND == "gemini" else "gpt-4o")
+LLM_CONCURRENCY = int(os.getenv("LLM_CONCURRENCY", "8"))  # in-flight requests for batch extraction
 
 # --- Traveler ---
 DEFAULT_TRAVELER_NAME = os.getenv("TRAVELER_NAME", "Matthew Turzo")
 
 # --- Paths ---
 MBOX_PATH = os.getenv("MBOX_PATH", str(PROJECT_ROOT / "2025-1-16_TRAVEL_MATTHEW TURZO.mbox"))
-EXTRACTION_CACHE_PATH = PROJECT_ROOT / "extraction_cache_v2.json"
+EXTRACTION_CACHE_PATH = PROJECT_ROOT / "extraction_cache_v2.sqlite"
 OUTPUT_DIR = PROJECT_ROOT / "output"
 
 # --- Assembly ---
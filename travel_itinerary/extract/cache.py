@@ -1,41 +1,77 @@
-"""Hash-based extraction cache to avoid re-calling the LLM API."""
+"""Hash-based extraction cache to avoid re-calling the LLM API.
 
-import json
+Entries live in a SQLite table keyed by email hash, with the extraction
+stored as a JSON blob. Lookups read a single row and only that value is
+deserialized; each ``put`` is one upsert, so nothing is rewritten.
+"""
+
+import sqlite3
 from pathlib import Path
 from typing import Any, Dict, Optional
 
 from travel_itinerary.config import EXTRACTION_CACHE_PATH
+from travel_itinerary.jsonutil import dumps, loads
 
 
 class ExtractionCache:
     def __init__(self, path: Path = EXTRACTION_CACHE_PATH):
         self.path = path
-        self._data: Dict[str, Any] = {}
-        self._load()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.path, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS cache (h TEXT PRIMARY KEY, v BLOB NOT NULL)")
+        self._migrate()
 
-    def _load(self):
-        if self.path.exists():
+    def _migrate(self):
+        """One-shot import from the older JSON and JSON Lines cache files."""
+        if self._conn.execute("SELECT 1 FROM cache LIMIT 1").fetchone():
+            return
+
+        data: Dict[str, Any] = {}
+        legacy_json = self.path.with_suffix(".json")
+        if legacy_json.exists():
+            try:
+                data.update(loads(legacy_json.read_bytes()))
+            except (ValueError, TypeError, OSError):
+                pass  # JSONDecodeError is a ValueError; TypeError if it isn't an object
+        legacy_jsonl = self.path.with_suffix(".jsonl")
+        if legacy_jsonl.exists():
             try:
-                self._data = json.loads(self.path.read_text(encoding="utf-8"))
-            except (json.JSONDecodeError, OSError):
-                self._data = {}
+                with legacy_jsonl.open("rb") as f:
+                    for line in f:
+                        try:
+                            entry = loads(line)
+                            data[entry["k"]] = entry["v"]
+                        except (ValueError, TypeError, KeyError):
+                            continue  # e.g. a line truncated by a crash
+            except OSError:
+                pass
+
+        if data:
+            self._conn.execute("BEGIN")
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO cache (h, v) VALUES (?, ?)",
+                ((k, dumps(v, default=str)) for k, v in data.items()),
+            )
+            self._conn.execute("COMMIT")
 
     def get(self, email_hash: str) -> Optional[Dict[str, Any]]:
-        return self._data.get(email_hash)
+        row = self._conn.execute("SELECT v FROM cache WHERE h = ?", (email_hash,)).fetchone()
+        return loads(row[0]) if row else None
 
     def put(self, email_hash: str, extraction: Dict[str, Any]):
-        self._data[email_hash] = extraction
-        self._save()
-
-    def _save(self):
-        self.path.parent.mkdir(parents=True, exist_ok=True)
-        self.path.write_text(
-            json.dumps(self._data, indent=2, ensure_ascii=False, default=str),
-            encoding="utf-8",
+        self._conn.execute(
+            "INSERT OR REPLACE INTO cache (h, v) VALUES (?, ?)",
+            (email_hash, dumps(extraction, default=str)),
         )
 
+    def close(self):
+        """Close the connection, checkpointing the write-ahead log into the main file."""
+        self._conn.close()
+
     def __len__(self):
-        return len(self._data)
+        return self._conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
 
     def __contains__(self, key: str) -> bool:
-        return key in self._data
+        return self._conn.execute("SELECT 1 FROM cache WHERE h = ? LIMIT 1", (key,)).fetchone() is not None
@@ -3,9 +3,8 @@
 import hashlib
 import mailbox
 from email.header import decode_header
-from typing import Any, Dict
-
-from bs4 import BeautifulSoup
+from html.parser import HTMLParser
+from typing import Any, Dict, List
 
 
 def decode_str(s: str) -> str:
@@ -24,6 +23,42 @@ def decode_str(s: str) -> str:
     return "".join(parts)
 
 
+class _HTMLTextExtractor(HTMLParser):
+    """Collect stripped text runs from HTML in one streaming pass.
+
+    Matches BeautifulSoup's get_text(separator=" ", strip=True) with
+    <script>/<style> removed, without building a DOM.
+    """
+
+    _SKIP_TAGS = frozenset(("script", "style"))
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.chunks: List[str] = []
+        self._skip_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self._SKIP_TAGS:
+            self._skip_depth += 1
+
+    def handle_endtag(self, tag):
+        if tag in self._SKIP_TAGS and self._skip_depth:
+            self._skip_depth -= 1
+
+    def handle_data(self, data):
+        if not self._skip_depth:
+            data = data.strip()
+            if data:
+                self.chunks.append(data)
+
+
+def html_to_text(html: str) -> str:
+    parser = _HTMLTextExtractor()
+    parser.feed(html)
+    parser.close()
+    return " ".join(parser.chunks)
+
+
 def extract_content(msg: mailbox.Message) -> Dict[str, Any]:
     """Extract subject, from, body, date, and message_id from a mailbox message."""
     subject = decode_str(msg.get("subject", ""))
@@ -54,10 +89,7 @@ def extract_content(msg: mailbox.Message) -> Dict[str, Any]:
                 body_text = p.decode(errors="ignore")
 
     if html_content and not body_text:
-        soup = BeautifulSoup(html_content, "html.parser")
-        for s in soup(["script", "style"]):
-            s.decompose()
-        body_text = soup.get_text(separator=" ", strip=True)
+        body_text = html_to_text(html_content)
 
     return {
         "subject": subject,
@@ -69,6 +101,11 @@ def extract_content(msg: mailbox.Message) -> Dict[str, Any]:
 
 
 def email_hash(content: Dict[str, Any]) -> str:
-    """Stable hash for an email based on subject + date + from."""
+    """Stable hash for an email based on subject + date + from.
+
+    The value keys the on-disk extraction cache, so the algorithm must not
+    change without re-keying it. MD5 is a cache key here, not a security
+    control, which also keeps it usable on FIPS-restricted builds.
+    """
     key = f"{content.get('subject', '')}|{content.get('date', '')}|{content.get('from', '')}"
-    return hashlib.md5(key.encode("utf-8")).hexdigest()
+    return hashlib.md5(key.encode("utf-8"), usedforsecurity=False).hexdigest()
@@ -1,7 +1,10 @@
 """LLM extraction of structured travel data from email content."""
 
+import hashlib
 import json
-import re
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import lru_cache
 from typing import Any, Dict, List, Optional
 
 from openai import OpenAI
@@ -9,25 +12,30 @@ from openai import OpenAI
 from travel_itinerary.config import (
     GOOGLE_API_KEY,
     LLM_BACKEND,
+    LLM_CONCURRENCY,
     LLM_MODEL_FALLBACK,
     LLM_MODEL_PRIMARY,
     MAX_BODY_CHARS,
     OPENAI_API_KEY,
 )
+from travel_itinerary.jsonutil import loads
 
 _client: Optional[OpenAI] = None
+_client_lock = threading.Lock()
 
 
 def _get_client() -> OpenAI:
     global _client
     if _client is None:
-        if LLM_BACKEND == "gemini":
-            _client = OpenAI(
-                api_key=GOOGLE_API_KEY,
-                base_url="https://generativelanguage.googleapis.com/v1beta/openai/",
-            )
-        else:
-            _client = OpenAI(api_key=OPENAI_API_KEY)
+        with _client_lock:
+            if _client is None:
+                if LLM_BACKEND == "gemini":
+                    _client = OpenAI(
+                        api_key=GOOGLE_API_KEY,
+                        base_url="https://generativelanguage.googleapis.com/v1beta/openai/",
+                    )
+                else:
+                    _client = OpenAI(api_key=OPENAI_API_KEY)
     return _client
 
 
@@ -80,13 +88,30 @@ Rules:
 - Return ONLY the JSON object, no extra text.
 """
 
+# Routes every request that shares the system prompt to the same prompt
+# cache; derived from the prompt text so edits start a fresh cache.
+_PROMPT_CACHE_KEY = "travel_extract_" + hashlib.sha1(EXTRACTION_PROMPT.encode()).hexdigest()[:12]
+
 
 def _build_user_message(email_content: Dict[str, Any]) -> str:
-    body = email_content.get("body", "")[:MAX_BODY_CHARS]
+    return _format_user_message(
+        email_content.get("subject", ""),
+        email_content.get("from", ""),
+        email_content.get("date", ""),
+        # Truncated before the cached call so the cache keys stay bounded too
+        email_content.get("body", "")[:MAX_BODY_CHARS],
+    )
+
+
+# Repeats come from the fallback model re-asking about the same email and from
+# duplicate messages in an export. Bodies arrive already truncated to
+# MAX_BODY_CHARS, which bounds the memory each entry holds.
+@lru_cache(maxsize=256)
+def _format_user_message(subject: str, sender: str, date: str, body: str) -> str:
     return (
-        f"Subject: {email_content.get('subject', '')}\n"
-        f"From: {email_content.get('from', '')}\n"
-        f"Date: {email_content.get('date', '')}\n"
+        f"Subject: {subject}\n"
+        f"From: {sender}\n"
+        f"Date: {date}\n"
         f"---\n{body}"
     )
 
@@ -95,14 +120,55 @@ def _parse_response(text: str) -> Dict[str, Any]:
     """Parse the LLM response, stripping markdown fences if present."""
     text = text.strip()
     if text.startswith("```"):
-        text = re.sub(r"^```(?:json)?\s*", "", text)
-        text = re.sub(r"\s*```$", "", text)
+        text = text[3:].removeprefix("json").lstrip()
+        if text.endswith("```"):
+            text = text[:-3].rstrip()
     try:
-        return json.loads(text)
+        return loads(text)
     except json.JSONDecodeError:
         return {"event_type": None, "confidence": 0.0, "parse_error": text[:200]}
 
 
+def _read_json_object(stream) -> str:
+    """Collect streamed content up to the end of the first top-level JSON object.
+
+    Anything the model generates after the closing brace is never waited for:
+    the stream is closed as soon as the object is complete. If no object
+    closes, everything received is returned for _parse_response to judge.
+    """
+    parts: List[str] = []
+    depth = 0
+    in_string = escaped = False
+    try:
+        for chunk in stream:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if not delta:
+                continue
+            for i, ch in enumerate(delta):
+                if in_string:
+                    if escaped:
+                        escaped = False
+                    elif ch == "\\":
+                        escaped = True
+                    elif ch == '"':
+                        in_string = False
+                elif ch == '"':
+                    in_string = depth > 0
+                elif ch == "{":
+                    depth += 1
+                elif ch == "}" and depth:
+                    depth -= 1
+                    if not depth:
+                        parts.append(delta[:i + 1])
+                        return "".join(parts)
+            parts.append(delta)
+    finally:
+        stream.close()
+    return "".join(parts)
+
+
 def extract_single(
     email_content: Dict[str, Any],
     model: Optional[str] = None,
@@ -112,7 +178,7 @@ def extract_single(
     model = model or LLM_MODEL_PRIMARY
     user_msg = _build_user_message(email_content)
 
-    resp = client.chat.completions.create(
+    stream = client.chat.completions.create(
         model=model,
         messages=[
             {"role": "system", "content": EXTRACTION_PROMPT},
@@ -120,8 +186,11 @@ def extract_single(
         ],
         temperature=0.0,
         max_tokens=1000,
+        stream=True,
+        # Gemini's OpenAI-compatible endpoint caches shared prefixes implicitly
+        extra_body={"prompt_cache_key": _PROMPT_CACHE_KEY} if LLM_BACKEND == "openai" else None,
     )
-    raw = resp.choices[0].message.content or ""
+    raw = _read_json_object(stream)
     result = _parse_response(raw)
     result["_model_used"] = model
     return result
@@ -144,12 +213,41 @@ def extract_with_fallback(email_content: Dict[str, Any]) -> Dict[str, Any]:
 def extract_batch(
     emails: List[Dict[str, Any]],
     progress_callback=None,
-) -> List[Dict[str, Any]]:
-    """Extract from a list of emails with optional progress callback."""
-    results = []
-    for i, email_content in enumerate(emails):
-        result = extract_with_fallback(email_content)
-        results.append(result)
-        if progress_callback:
-            progress_callback(i + 1, len(emails))
+    max_workers: int = LLM_CONCURRENCY,
+    on_result=None,
+    on_error=None,
+) -> List[Optional[Dict[str, Any]]]:
+    """Extract from a list of emails with optional progress callback.
+
+    Requests run concurrently on a thread pool so network round-trips
+    overlap; results come back in input order. on_result(index, result)
+    is called on the caller's thread as each extraction lands. Without
+    on_error the first failure is raised; with it, on_error(index, exc)
+    is called and that email's result is left as None.
+    """
+    results: List[Optional[Dict[str, Any]]] = [None] * len(emails)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {
+            pool.submit(extract_with_fallback, email_content): i
+            for i, email_content in enumerate(emails)
+        }
+        try:
+            for done, future in enumerate(as_completed(futures), start=1):
+                i = futures[future]
+                try:
+                    results[i] = future.result()
+                except Exception as e:
+                    if on_error is None:
+                        raise
+                    on_error(i, e)
+                else:
+                    if on_result:
+                        on_result(i, results[i])
+                if progress_callback:
+                    progress_callback(done, len(emails))
+        except BaseException:
+            pool.shutdown(wait=False, cancel_futures=True)
+            raise
+
     return results
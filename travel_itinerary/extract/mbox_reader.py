@@ -0,0 +1,84 @@
+"""Single-pass streaming reader for mbox files."""
+
+import mailbox
+import os
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple, Union
+
+_READ_BUFFER = 1 << 20  # large sequential reads; mbox exports run to GBs
+
+
+def _frame(from_line: bytes, lines: List[bytes]) -> Tuple[str, bytes]:
+    """Frame a message exactly as mailbox.mbox.get_message() does."""
+    # The blank separator line before the next "From " line isn't part of the message
+    if lines and lines[-1] == mailbox.linesep:
+        lines.pop()
+    from_ = from_line.replace(mailbox.linesep, b"")[5:].decode("ascii")
+    return from_, b"".join(lines).replace(mailbox.linesep, b"\n")
+
+
+def iter_mbox_raw(
+    path: Union[str, Path],
+    start: int = 0,
+    end: Optional[int] = None,
+) -> Iterator[Tuple[str, bytes]]:
+    """Yield (envelope sender line, raw message bytes) from one buffered sequential read.
+
+    mailbox.mbox scans the whole file to build a table of contents before
+    seeking back to re-read every message; this reads each byte once and
+    never holds more than the current message in memory.
+
+    With start/end (as produced by split_mbox), only messages whose "From "
+    line begins in [start, end) are yielded.
+    """
+    with open(path, "rb", buffering=_READ_BUFFER) as f:
+        f.seek(start)
+        pos = start
+        from_line = None
+        lines: List[bytes] = []
+        for line in f:
+            if line.startswith(b"From "):
+                if end is not None and pos >= end:
+                    break
+                if from_line is not None:
+                    yield _frame(from_line, lines)
+                from_line = line
+                lines = []
+            elif from_line is not None:
+                lines.append(line)
+            pos += len(line)
+        if from_line is not None:
+            yield _frame(from_line, lines)
+
+
+def split_mbox(path: Union[str, Path], parts: int) -> List[Tuple[int, int]]:
+    """Split an mbox into at most `parts` byte ranges that each start on a "From " line.
+
+    Boundaries are found by seeking to evenly spaced offsets and scanning
+    forward to the next message, so the file is not read end to end.
+    """
+    size = os.path.getsize(path)
+    bounds = [0]
+    with open(path, "rb") as f:
+        for k in range(1, parts):
+            f.seek(max(size * k // parts - 1, 0))
+            f.readline()  # finish the line the seek landed in
+            pos = f.tell()
+            line = f.readline()
+            while line and not line.startswith(b"From "):
+                pos += len(line)
+                line = f.readline()
+            if not line:
+                break
+            if pos > bounds[-1]:
+                bounds.append(pos)
+    bounds.append(size)
+    return list(zip(bounds, bounds[1:]))
+
+
+def iter_mbox(path: Union[str, Path]) -> Iterator[mailbox.mboxMessage]:
+    """Yield each message of an mbox file, parsed as mailbox.mbox would."""
+    for from_, raw in iter_mbox_raw(path):
+        msg = mailbox.mboxMessage(raw)
+        msg.set_from(from_)
+        yield msg
@@ -0,0 +1,32 @@
+"""JSON encoding and decoding, using orjson when it is installed."""
+
+import json
+from typing import Any, Callable, Optional, Union
+
+try:
+    import orjson
+except ImportError:  # optional speedup; stdlib json is used otherwise
+    orjson = None
+
+
+def dumps(value: Any, indent: bool = False, default: Optional[Callable] = None) -> bytes:
+    """Serialize to UTF-8 JSON: compact, or indented by two spaces with indent=True."""
+    if orjson is not None:
+        return orjson.dumps(value, default=default, option=orjson.OPT_INDENT_2 if indent else None)
+    return json.dumps(
+        value,
+        ensure_ascii=False,
+        default=default,
+        indent=2 if indent else None,
+        separators=None if indent else (",", ":"),
+    ).encode("utf-8")
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    """Parse JSON, raising json.JSONDecodeError on bad input either way."""
+    if orjson is not None:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            pass  # stricter than json (e.g. NaN); let json have a go
+    return json.loads(data)
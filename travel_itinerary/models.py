@@ -1,6 +1,8 @@
 """Data models for the travel itinerary pipeline."""
 
 from __future__ import annotations
+
+import sys
 from dataclasses import dataclass, field
 from datetime import date
 from enum import Enum
@@ -22,15 +24,18 @@ class SignalType(str, Enum):
     PRESENT = "present"
 
 
-@dataclass
+@dataclass(slots=True)
 class Location:
     city: str  # canonical city name after normalization
     raw: str = ""  # original string before normalization
     iata: str = ""  # airport code if applicable
     country: str = ""
 
+    def __post_init__(self):
+        self.city = sys.intern(self.city)
+
 
-@dataclass
+@dataclass(slots=True)
 class FlightLeg:
     origin: Location
     destination: Location
@@ -40,7 +45,7 @@ class FlightLeg:
     carrier: str = ""
 
 
-@dataclass
+@dataclass(slots=True)
 class TravelEvent:
     event_type: EventType
     start_date: Optional[date] = None
@@ -56,10 +61,10 @@ class TravelEvent:
     source_email_id: str = ""
     source_subject: str = ""
     extraction_confidence: float = 0.0
-    raw_extraction: dict = field(default_factory=dict)
+    raw_extraction: Optional[dict] = None  # LLM output this event was built from
 
 
-@dataclass
+@dataclass(slots=True)
 class CitySignal:
     """A single temporal signal about presence in a city."""
     signal_type: SignalType
@@ -68,9 +73,10 @@ class CitySignal:
     strength: float = 1.0  # 1.0 = strong (flight), 0.5 = weak (car rental)
     source_event: Optional[TravelEvent] = None
     method: str = ""  # "flight_arrival", "hotel_checkin", etc.
+    city_key: str = ""  # interned lowercase city, for identity comparison
 
 
-@dataclass
+@dataclass(slots=True)
 class Accommodation:
     name: str
     provider: str = ""
@@ -79,7 +85,7 @@ class Accommodation:
     confirmation: str = ""
 
 
-@dataclass
+@dataclass(slots=True)
 class Activity:
     name: str
     provider: str = ""
@@ -87,7 +93,7 @@ class Activity:
     confirmation: str = ""
 
 
-@dataclass
+@dataclass(slots=True)
 class CityVisit:
     city: str
     enter_date: Optional[date] = None
@@ -101,7 +107,7 @@ class CityVisit:
     notes: list[str] = field(default_factory=list)
 
 
-@dataclass
+@dataclass(slots=True)
 class Gap:
     last_known_city: str
     last_known_date: Optional[date] = None
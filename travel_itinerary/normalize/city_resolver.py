@@ -1,6 +1,10 @@
 """Normalize city names to canonical forms."""
 
 import re
+import sys
+from functools import lru_cache
+from typing import List, Optional
+
 from travel_itinerary.normalize.iata import iata_to_city
 
 # Maps raw variations → canonical name
@@ -106,95 +110,176 @@ _ALIASES = {
 }
 
 # Words that indicate a string is a hotel/property name, not a city
-_HOTEL_INDICATORS = re.compile(
-    r'\b(hotel|inn|resort|suites?|motel|hostel|lodge|bnb|airbnb|'
-    r'collection|autograph|tapestry|curio|tribute|marriott|hilton|'
-    r'hyatt|wyndham|sheraton|westin|aloft|courtyard)\b',
-    re.I,
-)
+_HOTEL_WORDS = frozenset((
+    "hotel", "inn", "resort", "suite", "suites", "motel", "hostel", "lodge", "bnb", "airbnb",
+    "collection", "autograph", "tapestry", "curio", "tribute", "marriott", "hilton",
+    "hyatt", "wyndham", "sheraton", "westin", "aloft", "courtyard",
+))
+# Words that can introduce the city in an airport name ("Kennedy Intl, New York")
+_AIRPORT_WORDS = frozenset(("intl", "international", "airport", "apt"))
+_WORD_RE = re.compile(r'\w+')
+
+
+def _has_hotel_word(s: str) -> bool:
+    # Whole-word, case-insensitive: the same matches as a \b(...)\b alternation,
+    # but one tokenizing pass plus set probes instead of trying every word
+    return not _HOTEL_WORDS.isdisjoint(_WORD_RE.findall(s.casefold()))
+
+
+_ZIP_RE = re.compile(r'\d{5}')
+_CITY_STATE_ZIP_RE = re.compile(r',\s*([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*),\s*[A-Z]{2}\s+\d{5}')
+_STATE_SUFFIX_RE = re.compile(r',\s*[A-Z]{2}(\s+\d{5})?$')
+_STATE_COUNTRY_SUFFIX_RE = re.compile(r',\s*[A-Z]{2},?\s*(US|USA)?\s*(\([A-Z]{3}\))?$', re.I)
+_CITY_TOKEN_RE = re.compile(r'^[A-Z][a-z]+(?:\s+[A-Z][a-z]+)?$')
 
 
+def _lookup_alias(name: str) -> str:
+    """Canonical city for a known alias (case-insensitive), else ""."""
+    return _ALIASES.get(name.casefold(), "")
+
+
+def _after_airport_word(s: str) -> str:
+    """Return the text after "<name> Intl|International|Airport|Apt[,]", or ""."""
+    tokens = s.split()
+    # The keyword needs a name before it and a city after it
+    for i in range(1, len(tokens) - 1):
+        token = tokens[i]
+        if token.endswith(","):
+            token = token[:-1]
+        if token.lower() in _AIRPORT_WORDS:
+            return s.split(None, i + 1)[-1]
+    return ""
+
+
+def _city_from_parts(parts: Optional[List[str]]) -> str:
+    """Scan the pieces of a split hotel/property string, last first, for a city."""
+    for part in reversed(parts or ()):
+        part = part.strip()
+        city = _lookup_alias(part)
+        if city:
+            return city
+        if _CITY_TOKEN_RE.match(part) and not _has_hotel_word(part):
+            return part
+    return ""
+
+
+def _alias_after_hotel_word(words: List[str]) -> str:
+    """Canonical city when the words after the last hotel word are an alias, else "".
+
+    Anchored at both ends, and only when the property has a name of its own
+    before the hotel word ("Hilton Garden Inn Denver"). In "Hotel Madison"
+    or "Hilton Queens" the trailing word is the property's name, and city
+    names inside a name ("Hotel Paris Las Vegas", "The Inn at Little
+    Washington") stay unresolved rather than resolving wrongly.
+
+    >>> [resolve_city(name) for name in (
+    ...     "Hotel Madison", "Hotel Providence", "Hotel Florence", "Hotel Charlotte",
+    ...     "Hotel Lima", "Hotel Webster", "Hotel Jamaica", "Hotel Malta",
+    ...     "Hotel Liberia", "The Hotel Madison", "Inn Santiago", "Hilton Queens",
+    ...     "Hotel Paris Las Vegas", "The Inn at Little Washington")]
+    ['', '', '', '', '', '', '', '', '', '', '', '', '', '']
+    >>> resolve_city("Hilton Garden Inn Denver"), resolve_city("Distrikt Hotel NYC")
+    ('Denver', 'New York')
+    """
+    for i in range(len(words) - 1, -1, -1):
+        if words[i] in _HOTEL_WORDS:
+            if all(w == "the" for w in words[:i]):
+                return ""
+            return _ALIAS_PHRASES.get(" ".join(words[i + 1:]), "")
+    return ""
+
+
+# Pure and called for every location of every event; the same raw strings
+# ("LAX", "New York, NY") recur throughout an export.
+@lru_cache(maxsize=8192)
 def resolve_city(raw: str) -> str:
     """Normalize a raw city/location string to a canonical city name.
 
     Tries in order:
-    1. Exact alias match (case-insensitive)
+    1. Exact alias match (case-insensitive; canonical names map to themselves)
     2. IATA code match (if input looks like a 3-letter code)
     3. Strip state/country suffixes and try again
     4. Return cleaned-up original
     """
+    # Interned so every occurrence of a city shares one string object and
+    # equality checks downstream short-circuit on identity
+    return sys.intern(_resolve_city(raw))
+
+
+def _resolve_city(raw: str) -> str:
     if not raw:
         return ""
 
     cleaned = raw.strip()
 
+    # 1. Direct alias — the common case, so it runs before any regex work
+    # (no alias contains a zip code, so the address step can't change these)
+    city = _lookup_alias(cleaned)
+    if city:
+        return city
+
+    # The address and suffix patterns below all need a comma
+    has_comma = "," in cleaned
+
     # Remove full addresses — just take city portion before street numbers
     # e.g. "Distrikt Hotel NYC, Tapestry Collection by Hilton, 342 W 40th Street, New York, NY 10018"
     # We want "New York" from that
-    if re.search(r'\d{5}', cleaned):  # has a zip code
+    if has_comma and _ZIP_RE.search(cleaned):  # has a zip code
         # Try to extract the city before the state+zip
-        m = re.search(r',\s*([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*),\s*[A-Z]{2}\s+\d{5}', cleaned)
+        m = _CITY_STATE_ZIP_RE.search(cleaned)
         if m:
             cleaned = m.group(1)
-
-    lowered = cleaned.lower().strip()
-
-    # 1. Direct alias
-    if lowered in _ALIASES:
-        return _ALIASES[lowered]
+            city = _lookup_alias(cleaned)
+            if city:
+                return city
+            has_comma = False
 
     # 2. IATA code
-    if re.match(r'^[A-Z]{3}$', cleaned):
+    if len(cleaned) == 3 and cleaned.isascii() and cleaned.isalpha() and cleaned.isupper():
         city = iata_to_city(cleaned)
         if city:
             return city
 
-    # 3. Strip ", STATE" or ", COUNTRY" suffixes
-    base = re.sub(r',\s*[A-Z]{2}(\s+\d{5})?$', '', cleaned).strip()
-    base_lower = base.lower()
-    if base_lower in _ALIASES:
-        return _ALIASES[base_lower]
+    if has_comma:
+        # 3. Strip ", STATE" or ", COUNTRY" suffixes
+        city = _lookup_alias(_STATE_SUFFIX_RE.sub('', cleaned).strip())
+        if city:
+            return city
+
+        # 4. Strip ", XX, US" pattern
+        city = _lookup_alias(_STATE_COUNTRY_SUFFIX_RE.sub('', cleaned).strip())
+        if city:
+            return city
 
-    # 4. Strip ", XX, US" pattern
-    base2 = re.sub(r',\s*[A-Z]{2},?\s*(US|USA)?\s*(\([A-Z]{3}\))?$', '', cleaned, flags=re.I).strip()
-    base2_lower = base2.lower()
-    if base2_lower in _ALIASES:
-        return _ALIASES[base2_lower]
+    # Split once; steps 5 and 6 both look at the dash- and comma-separated parts
+    dash_parts = cleaned.split(" - ") if " - " in cleaned else None
+    comma_parts = cleaned.split(", ") if ", " in cleaned else None
 
     # 5. If it looks like a hotel name, try to find a city in it
     # e.g. "The Ambrose - Santa Monica" → try "Santa Monica"
-    if " - " in cleaned:
-        after_dash = cleaned.split(" - ")[-1].strip()
-        after_lower = after_dash.lower()
-        if after_lower in _ALIASES:
-            return _ALIASES[after_lower]
+    if dash_parts:
+        after_dash = dash_parts[-1].strip()
+        city = _lookup_alias(after_dash)
+        if city:
+            return city
         # Also try as-is (it might already be a city name)
-        if len(after_dash.split()) <= 3 and after_dash[0].isupper() and not _HOTEL_INDICATORS.search(after_dash):
+        if len(after_dash.split()) <= 3 and after_dash[0].isupper() and not _has_hotel_word(after_dash):
             return after_dash
 
+    # One tokenizing pass answers both keyword checks below
+    words = _WORD_RE.findall(cleaned.casefold())
+
     # 6. Detect hotel/property names — these are NOT cities
-    if _HOTEL_INDICATORS.search(cleaned):
-        # Try to find a city name after a dash or comma
-        for sep in [" - ", ", "]:
-            if sep in cleaned:
-                for part in reversed(cleaned.split(sep)):
-                    part = part.strip()
-                    part_lower = part.lower()
-                    if part_lower in _ALIASES:
-                        return _ALIASES[part_lower]
-                    if re.match(r'^[A-Z][a-z]+(?:\s+[A-Z][a-z]+)?$', part) and not _HOTEL_INDICATORS.search(part):
-                        return part
-        # Can't extract a city from the hotel name
-        return ""
+    if not _HOTEL_WORDS.isdisjoint(words):
+        # Try to find a city name after a dash or comma, then right after the hotel word
+        # e.g. "Distrikt Hotel NYC" → "New York"
+        # (empty string if we can't extract a city from the hotel name)
+        return _city_from_parts(dash_parts) or _city_from_parts(comma_parts) or _alias_after_hotel_word(words)
 
     # 7. Detect airport names — "Kennedy Intl, New York" etc.
-    airport_match = re.match(r'^(.+?)\s+(?:Intl|International|Airport|Apt),?\s+(.+)$', cleaned, re.I)
-    if airport_match:
-        city_part = airport_match.group(2).strip()
-        city_lower = city_part.lower()
-        if city_lower in _ALIASES:
-            return _ALIASES[city_lower]
-        return city_part
+    city_part = not _AIRPORT_WORDS.isdisjoint(words) and _after_airport_word(cleaned)
+    if city_part:
+        return _lookup_alias(city_part) or city_part
 
     # 8. Return with title case cleanup if it looks like a city
     if cleaned and not any(c.isdigit() for c in cleaned) and len(cleaned) < 50:
@@ -455,3 +540,20 @@ CITY_TO_COORDS = {
     # --- Z ---
     "Zurich": (47.3769, 8.5417),
 }
+
+
+# Canonical names resolve to themselves in one lookup instead of falling
+# through every step; explicit aliases above take precedence.
+_ALIASES = {alias.casefold(): sys.intern(city) for alias, city in _ALIASES.items()}
+for _city in (*_ALIASES.values(), *CITY_TO_COORDS):
+    _ALIASES.setdefault(_city.casefold(), sys.intern(_city))
+del _city
+
+# Aliases that are plain space-separated words, for spotting a city at the
+# end of a hotel name. Two-letter keys ("la", "sf") are left out as they collide with
+# ordinary words, and so are keys containing a hotel word.
+_ALIAS_PHRASES = {
+    key: city
+    for key, city in _ALIASES.items()
+    if len(key) > 2 and " ".join(_WORD_RE.findall(key)) == key and _HOTEL_WORDS.isdisjoint(key.split())
+}
@@ -2,11 +2,50 @@
 
 import re
 from datetime import date, datetime
+from functools import lru_cache
 from typing import Optional
 
 from dateutil import parser as dateutil_parser
 
+_DDMONYY_RE = re.compile(r'^(\d{2})([A-Z]{3})(\d{2,4})$', re.I)
+_US_SLASH_RE = re.compile(r'^(\d{1,2})/(\d{1,2})/(\d{4})$')
+# "Mon, 02 Jan 2023 10:00:00 +0000" — the time and zone are checked so
+# malformed headers still go to dateutil, which rejects them
+_RFC2822_RE = re.compile(
+    r'^([A-Za-z]{3}), {1,2}(\d{1,2}) ([A-Za-z]{3}) ([1-9]\d{3}) '
+    r'(?:[01]?\d|2[0-3]):[0-5]\d(?::[0-5]\d)? (?:[+-](?:[01]\d|2[0-3])[0-5]\d|GMT|UTC)(?: \(UTC\))?$'
+)
+_DMY_RE = re.compile(r'^(\d{1,2}) ([A-Za-z]{3,9}) ([1-9]\d{3})$')
+_MDY_RE = re.compile(r'^([A-Za-z]{3,9}) (\d{1,2}),? ([1-9]\d{3})$')
 
+_WEEKDAYS = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+_MONTHS = {
+    name: i
+    for i, names in enumerate(
+        (("jan", "january"), ("feb", "february"), ("mar", "march"), ("apr", "april"),
+         ("may",), ("jun", "june"), ("jul", "july"), ("aug", "august"),
+         ("sep", "sept", "september"), ("oct", "october"), ("nov", "november"), ("dec", "december")),
+        start=1,
+    )
+    for name in names
+}
+
+# dateutil.parser.parse() builds a fresh parser on every call; reuse one
+_DATEUTIL_PARSER = dateutil_parser.parser()
+
+
+def _ymd(year: str, month: str, day: str) -> Optional[date]:
+    """Build a date from regex groups with a month name, or None if invalid."""
+    mon = _MONTHS.get(month.lower())
+    if mon is None:
+        return None
+    try:
+        return date(int(year), mon, int(day))
+    except ValueError:
+        return None
+
+
+@lru_cache(maxsize=4096)
 def parse_date(raw: str) -> Optional[date]:
     """Parse a date string in many formats, returning a date or None.
 
@@ -17,41 +56,68 @@ def parse_date(raw: str) -> Optional[date]:
       - DDMONYYYY (e.g. 20JAN22, 09MAR2022)
       - RFC 2822 email dates
       - "Tue, Feb 20" style (no year — returns None since we can't guess)
+
+    Results are memoized: the same header and booking dates recur across
+    emails and events, and ``date`` objects are immutable.
     """
     if not raw or raw.strip().lower() in ("null", "none", "not specified", "unknown", ""):
         return None
 
     raw = raw.strip()
 
-    # 1. DDMONYY / DDMONYYYY (e.g. 20JAN22, 09MAR2022)
-    m = re.match(r'^(\d{2})([A-Z]{3})(\d{2,4})$', raw, re.I)
-    if m:
-        day, mon, year = m.groups()
-        year = year if len(year) == 4 else f"20{year}"
+    # 1. YYYY-MM-DD (the shape check keeps out the other forms fromisoformat accepts)
+    if len(raw) == 10 and raw[4] == "-" and raw[7] == "-":
         try:
-            return datetime.strptime(f"{day}{mon.upper()}{year}", "%d%b%Y").date()
+            return date.fromisoformat(raw)
         except ValueError:
             pass
 
-    # 2. YYYY-MM-DD
-    m = re.match(r'^(\d{4})-(\d{2})-(\d{2})$', raw)
+    # 2. DDMONYY / DDMONYYYY (e.g. 20JAN22, 09MAR2022)
+    m = _DDMONYY_RE.match(raw)
     if m:
+        day, mon, year = m.groups()
+        year = year if len(year) == 4 else f"20{year}"
         try:
-            return date(int(m.group(1)), int(m.group(2)), int(m.group(3)))
+            return datetime.strptime(f"{day}{mon.upper()}{year}", "%d%b%Y").date()
         except ValueError:
             pass
 
     # 3. MM/DD/YYYY
-    m = re.match(r'^(\d{1,2})/(\d{1,2})/(\d{4})$', raw)
+    m = _US_SLASH_RE.match(raw)
     if m:
         try:
             return date(int(m.group(3)), int(m.group(1)), int(m.group(2)))
         except ValueError:
             pass
 
-    # 4. dateutil as general fallback (handles RFC 2822, "26 March 2024", etc.)
+    # 4. RFC 2822 email dates (e.g. "Mon, 02 Jan 2023 10:00:00 +0000")
+    m = _RFC2822_RE.match(raw)
+    if m and m.group(1).lower() in _WEEKDAYS:
+        result = _ymd(m.group(4), m.group(3), m.group(2))
+        if result:
+            return result
+
+    # 5. DD Month YYYY (e.g. "26 March 2024")
+    m = _DMY_RE.match(raw)
+    if m:
+        result = _ymd(m.group(3), m.group(2), m.group(1))
+        if result:
+            return result
+
+    # 6. Month DD, YYYY (e.g. "March 26, 2024")
+    m = _MDY_RE.match(raw)
+    if m:
+        result = _ymd(m.group(3), m.group(1), m.group(2))
+        if result:
+            return result
+
+    # 7. dateutil as general fallback for everything else. A string with no
+    # digits has no day to find, and fuzzy parsing would fill one in from
+    # today; over-long strings are prose, not dates.
+    if len(raw) > 64 or not any(c.isdigit() for c in raw):
+        return None
     try:
-        dt = dateutil_parser.parse(raw, fuzzy=True)
+        dt = _DATEUTIL_PARSER.parse(raw, fuzzy=True, ignoretz=True)
         return dt.date()
     except (ValueError, OverflowError):
         pass
@@ -59,6 +125,14 @@ def parse_date(raw: str) -> Optional[date]:
     return None
 
 
+@lru_cache(maxsize=512)
+def _default_for_email_date(email_date_str: str) -> Optional[datetime]:
+    """January 1 of the email's year, used by dateutil for the missing fields."""
+    email_date = parse_date(email_date_str)
+    return datetime(email_date.year, 1, 1) if email_date else None
+
+
+@lru_cache(maxsize=4096)
 def parse_date_with_context(raw: str, email_date_str: str = "") -> Optional[date]:
     """Parse a date, using the email's send date to fill in missing year."""
     result = parse_date(raw)
@@ -66,11 +140,12 @@ def parse_date_with_context(raw: str, email_date_str: str = "") -> Optional[date
         return result
 
     # If raw is like "Feb 20" or "March 25" with no year, try adding the email year
-    if email_date_str:
-        email_date = parse_date(email_date_str)
-        if email_date:
+    # (a bare "Tuesday" or "February" has no day to anchor, so it stays None)
+    if email_date_str and any(c.isdigit() for c in raw):
+        default = _default_for_email_date(email_date_str)
+        if default:
             try:
-                dt = dateutil_parser.parse(raw, default=datetime(email_date.year, 1, 1), fuzzy=True)
+                dt = _DATEUTIL_PARSER.parse(raw, default=default, fuzzy=True, ignoretz=True)
                 return dt.date()
             except (ValueError, OverflowError):
                 pass
@@ -1,5 +1,7 @@
 """IATA airport code → canonical city lookup."""
 
+from functools import lru_cache
+
 # ~200 most common codes, plus all codes seen in Matt's emails
 IATA_TO_CITY = {
     # --- North America ---
@@ -109,6 +111,8 @@ IATA_TO_CITY = {
 }
 
 
+# Called for every event and flight leg; the same few codes recur throughout
+@lru_cache(maxsize=2048)
 def iata_to_city(code: str) -> str:
     """Resolve an IATA code to a canonical city name. Returns empty string if unknown."""
     return IATA_TO_CITY.get(code.upper().strip(), "")
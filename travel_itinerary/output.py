@@ -1,16 +1,31 @@
 """Output formatters: CSV, JSON, HTML, and human-readable timeline."""
 
 import csv
-import json
+import heapq
 import io
 from datetime import date, timedelta
+from functools import lru_cache
+from operator import itemgetter
 from pathlib import Path
-from typing import List
+from typing import List, Optional
 
+from travel_itinerary.jsonutil import dumps
 from travel_itinerary.models import CityVisit, Gap, TravelEvent
 from travel_itinerary.normalize.city_resolver import CITY_TO_COUNTRY, CITY_TO_COORDS
 
+# Coalesce CSV rows into large writes instead of the default 8 KiB chunks
+_WRITE_BUFFER = 1 << 20
 
+# English month abbreviations, as strftime's %b gives in the C locale but
+# without the libc call or any dependence on the process locale
+_MONTH_ABBR = ("Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec")
+
+# Text nodes only need these three; no value is written into an attribute
+_HTML_ESCAPE = str.maketrans({"&": "&amp;", "<": "&lt;", ">": "&gt;"})
+
+
+# The same visit and booking dates are formatted by every writer below
+@lru_cache(maxsize=4096)
 def _date_str(d) -> str:
     if d is None:
         return "?"
@@ -23,70 +38,70 @@ def _date_str(d) -> str:
 # Human-readable timeline
 # ---------------------------------------------------------------------------
 
+_BANNER = "=" * 72
+_YEAR_RULE = "─" * 58
+
+
 def format_timeline(visits: List[CityVisit], gaps: List[Gap]) -> str:
     """Produce a human-readable line-by-line city itinerary."""
-    lines = []
-    lines.append("=" * 72)
-    lines.append("  TRAVEL ITINERARY — City-by-City Timeline")
-    lines.append("=" * 72)
-    lines.append("")
-
-    # Merge visits and gaps into one sorted list
-    items = []
-    for v in visits:
-        sort_date = v.enter_date or v.exit_date
-        if sort_date:
-            items.append(("visit", sort_date, v))
-    for g in gaps:
-        if g.last_known_date:
-            items.append(("gap", g.last_known_date, g))
-    items.sort(key=lambda x: x[1])
+    buf = io.StringIO()
+    w = buf.write
+    ds = _date_str
+    w(f"{_BANNER}\n  TRAVEL ITINERARY — City-by-City Timeline\n{_BANNER}\n\n")
+
+    # Merge visits and gaps into one date-ordered stream. Both usually arrive
+    # in order already, so the sorts are linear; on equal dates the merge
+    # yields visits first, matching a stable sort of visits + gaps.
+    by_date = itemgetter(1)
+    visit_items = sorted(
+        (("visit", v.enter_date or v.exit_date, v) for v in visits if v.enter_date or v.exit_date),
+        key=by_date,
+    )
+    gap_items = sorted((("gap", g.last_known_date, g) for g in gaps if g.last_known_date), key=by_date)
+    items = heapq.merge(visit_items, gap_items, key=by_date)
 
     current_year = None
 
+    # Every line is written with its trailing newline; only the closing rule has none
     for item_type, sort_date, item in items:
         # Year header
         if sort_date.year != current_year:
             current_year = sort_date.year
-            lines.append(f"\n--- {current_year} {'─' * 58}")
+            w(f"\n--- {current_year} {_YEAR_RULE}\n")
 
         if item_type == "visit":
             v = item
-            enter = _date_str(v.enter_date)
-            exit_ = _date_str(v.exit_date)
             conf_str = f"  [{v.confidence:.0%}]" if v.confidence else ""
 
-            lines.append(f"\n  {enter}  →  {exit_}  |  {v.city}{conf_str}")
-            lines.append(f"    Enter: {v.enter_method}   Exit: {v.exit_method}")
+            w(
+                f"\n  {ds(v.enter_date)}  →  {ds(v.exit_date)}  |  {v.city}{conf_str}\n"
+                f"    Enter: {v.enter_method}   Exit: {v.exit_method}\n"
+            )
 
             for acc in v.accommodations:
-                checkin = _date_str(acc.check_in)
-                checkout = _date_str(acc.check_out)
-                lines.append(f"    🏨 {acc.name} ({checkin} → {checkout})")
+                w(f"    🏨 {acc.name} ({ds(acc.check_in)} → {ds(acc.check_out)})\n")
                 if acc.confirmation:
-                    lines.append(f"       Ref: {acc.confirmation}")
+                    w(f"       Ref: {acc.confirmation}\n")
 
             for act in v.activities:
-                lines.append(f"    🎫 {act.name} ({_date_str(act.dt)})")
+                w(f"    🎫 {act.name} ({ds(act.dt)})\n")
 
             for note in v.notes:
-                lines.append(f"    ⚠ {note}")
+                w(f"    ⚠ {note}\n")
 
         elif item_type == "gap":
             g = item
-            lines.append(
+            w(
                 f"\n  ··· GAP: {g.duration_days} days "
-                f"({_date_str(g.last_known_date)} → {_date_str(g.next_known_date)})"
+                f"({ds(g.last_known_date)} → {ds(g.next_known_date)})\n"
+                f"      Last seen: {g.last_known_city}  →  Next seen: {g.next_known_city}\n"
             )
-            lines.append(f"      Last seen: {g.last_known_city}  →  Next seen: {g.next_known_city}")
             if g.note:
-                lines.append(f"      Note: {g.note}")
+                w(f"      Note: {g.note}\n")
 
-    lines.append(f"\n{'=' * 72}")
-    lines.append(f"  Total: {len(visits)} city visits, {len(gaps)} gaps")
-    lines.append("=" * 72)
+    w(f"\n{_BANNER}\n  Total: {len(visits)} city visits, {len(gaps)} gaps\n{_BANNER}")
 
-    return "\n".join(lines)
+    return buf.getvalue()
 
 
 # ---------------------------------------------------------------------------
@@ -96,40 +111,39 @@ def format_timeline(visits: List[CityVisit], gaps: List[Gap]) -> str:
 def visits_to_csv(visits: List[CityVisit], path: Path):
     """Write city visits to CSV."""
     path.parent.mkdir(parents=True, exist_ok=True)
-    with open(path, "w", newline="", encoding="utf-8") as f:
+    with open(path, "w", newline="", encoding="utf-8", buffering=_WRITE_BUFFER) as f:
         writer = csv.writer(f)
         writer.writerow([
             "city", "enter_date", "exit_date", "enter_method", "exit_method",
             "accommodations", "activities", "confidence", "notes",
         ])
-        for v in visits:
-            accs = "; ".join(
-                f"{a.name} ({_date_str(a.check_in)}→{_date_str(a.check_out)})"
-                for a in v.accommodations
-            )
-            acts = "; ".join(
-                f"{a.name} ({_date_str(a.dt)})" for a in v.activities
-            )
-            notes = "; ".join(v.notes)
-            writer.writerow([
+        writer.writerows(
+            (
                 v.city, _date_str(v.enter_date), _date_str(v.exit_date),
-                v.enter_method, v.exit_method, accs, acts,
-                f"{v.confidence:.2f}", notes,
-            ])
+                v.enter_method, v.exit_method,
+                "; ".join(
+                    f"{a.name} ({_date_str(a.check_in)}→{_date_str(a.check_out)})"
+                    for a in v.accommodations
+                ),
+                "; ".join(f"{a.name} ({_date_str(a.dt)})" for a in v.activities),
+                f"{v.confidence:.2f}", "; ".join(v.notes),
+            )
+            for v in visits
+        )
 
 
 def events_to_csv(events: List[TravelEvent], path: Path):
     """Write raw events to CSV for debugging."""
     path.parent.mkdir(parents=True, exist_ok=True)
-    with open(path, "w", newline="", encoding="utf-8") as f:
+    with open(path, "w", newline="", encoding="utf-8", buffering=_WRITE_BUFFER) as f:
         writer = csv.writer(f)
         writer.writerow([
             "event_type", "start_date", "end_date", "origin", "destination",
             "confirmation", "provider", "property_name", "activity_name",
             "source_subject", "confidence",
         ])
-        for ev in events:
-            writer.writerow([
+        writer.writerows(
+            (
                 ev.event_type.value,
                 _date_str(ev.start_date), _date_str(ev.end_date),
                 ev.origin.city if ev.origin else "",
@@ -137,7 +151,9 @@ def events_to_csv(events: List[TravelEvent], path: Path):
                 ev.confirmation_number, ev.provider,
                 ev.property_name, ev.activity_name,
                 ev.source_subject, f"{ev.extraction_confidence:.2f}",
-            ])
+            )
+            for ev in events
+        )
 
 
 # ---------------------------------------------------------------------------
@@ -198,13 +214,14 @@ def to_json(visits: List[CityVisit], gaps: List[Gap], path: Path):
             "cities_visited": sorted(set(v.city for v in visits if v.city)),
         },
     }
-    path.write_text(json.dumps(data, indent=2, ensure_ascii=False), encoding="utf-8")
+    path.write_bytes(dumps(data, indent=True))
 
 
 # ---------------------------------------------------------------------------
 # Global Entry HTML report
 # ---------------------------------------------------------------------------
 
+@lru_cache(maxsize=4096)
 def _parse_date(s: str):
     """Parse a date string, returning None for '?' or invalid."""
     if not s or s == "?":
@@ -221,8 +238,10 @@ def format_global_entry_html(visits: List[CityVisit], path: Path):
 
     # Build international-only rows, sorted most-recent first
     rows = []
+    countries = set()
+    country_of = CITY_TO_COUNTRY.get
     for v in visits:
-        country = CITY_TO_COUNTRY.get(v.city, "Unknown")
+        country = country_of(v.city, "Unknown")
         if country == "United States":
             continue
 
@@ -234,25 +253,28 @@ def format_global_entry_html(visits: List[CityVisit], path: Path):
         else:
             duration = ""
 
-        enter_fmt = enter.strftime("%b %d, %Y") if enter else "Unknown"
-        exit_fmt = exit_.strftime("%b %d, %Y") if exit_ else "Unknown"
+        enter_fmt = f"{_MONTH_ABBR[enter.month - 1]} {enter.day:02d}, {enter.year}" if enter else "Unknown"
+        exit_fmt = f"{_MONTH_ABBR[exit_.month - 1]} {exit_.day:02d}, {exit_.year}" if exit_ else "Unknown"
 
         sort_key = exit_ or enter or date.min
         rows.append((sort_key, country, v.city, enter_fmt, exit_fmt, duration))
+        countries.add(country)
 
     # Most recent first
-    rows.sort(key=lambda r: r[0], reverse=True)
+    rows.sort(key=itemgetter(0), reverse=True)
 
-    table_rows = ""
+    parts = []
+    esc = str.translate
     for _, country, city, enter_fmt, exit_fmt, duration in rows:
         dur_str = f"{duration}" if isinstance(duration, int) else "&mdash;"
-        table_rows += f"""        <tr>
-          <td>{country}</td>
-          <td>{city}</td>
+        parts.append(f"""        <tr>
+          <td>{esc(country, _HTML_ESCAPE)}</td>
+          <td>{esc(city, _HTML_ESCAPE)}</td>
           <td>{enter_fmt}</td>
           <td>{exit_fmt}</td>
           <td>{dur_str}</td>
-        </tr>\n"""
+        </tr>\n""")
+    table_rows = "".join(parts)
 
     html = f"""<!DOCTYPE html>
 <html lang="en">
@@ -328,24 +350,21 @@ def format_global_entry_html(visits: List[CityVisit], path: Path):
     <tbody>
 {table_rows}    </tbody>
   </table>
-  <p class="total">{len(rows)} trips to {len(set(r[1] for r in rows))} countries</p>
+  <p class="total">{len(rows)} trips to {len(countries)} countries</p>
 </body>
 </html>"""
 
-    path.write_text(html, encoding="utf-8")
+    path.write_bytes(html.encode("utf-8"))
 
 
 # ---------------------------------------------------------------------------
 # Travel map HTML (Leaflet.js)
 # ---------------------------------------------------------------------------
 
-def _human_duration(enter_str: str, exit_str: str) -> str:
-    """Format duration in human-friendly terms like '12 days' or '2 months'."""
-    enter = _parse_date(enter_str)
-    exit_ = _parse_date(exit_str)
-    if not enter or not exit_:
+def _human_duration(days: Optional[int]) -> str:
+    """Format a visit length in days as '12 days', '2 months' etc. ('' if unknown)."""
+    if days is None:
         return ""
-    days = (exit_ - enter).days
     if days == 0:
         return "day trip"
     if days == 1:
@@ -358,12 +377,11 @@ def _human_duration(enter_str: str, exit_str: str) -> str:
     return f"{months:.0f} months"
 
 
-def _month_year(date_str: str) -> str:
+def _month_year(d: Optional[date]) -> str:
     """Format a date as 'Jan 2023'."""
-    d = _parse_date(date_str)
     if not d:
         return "?"
-    return d.strftime("%b %Y")
+    return f"{_MONTH_ABBR[d.month - 1]} {d.year}"
 
 
 def format_travel_map_html(visits: List[CityVisit], path: Path):
@@ -371,9 +389,17 @@ def format_travel_map_html(visits: List[CityVisit], path: Path):
     path.parent.mkdir(parents=True, exist_ok=True)
 
     # Build visit data for JS
+    # One pass builds the visit records, the per-city pins (first-seen order,
+    # with indices into visits and total days) and the year range, so the
+    # page script only has to draw them
     js_visits = []
+    cities = {}
+    min_year = max_year = None
+    esc = str.translate
+    coords_of = CITY_TO_COORDS.get
+    country_of = CITY_TO_COUNTRY.get
     for v in visits:
-        coords = CITY_TO_COORDS.get(v.city)
+        coords = coords_of(v.city)
         if not coords:
             continue
 
@@ -388,16 +414,40 @@ def format_travel_map_html(visits: List[CityVisit], path: Path):
         exit_ = _parse_date(exit_str)
         sort_date = enter or exit_
 
+        # The page script inserts city, country and hotel names as HTML
         hotel = ""
         if v.accommodations:
-            hotel = v.accommodations[0].name
+            hotel = esc(v.accommodations[0].name, _HTML_ESCAPE)
+
+        days = exit_.toordinal() - enter.toordinal() if enter and exit_ else None
+        duration = _human_duration(days)
+        month = _month_year(sort_date)
+        country = esc(country_of(v.city, ""), _HTML_ESCAPE)
+        city_html = esc(v.city, _HTML_ESCAPE)
+
+        city = cities.get(v.city)
+        if city is None:
+            city = cities[v.city] = {
+                "city": city_html,
+                "country": country,
+                "lat": coords[0],
+                "lng": coords[1],
+                "visits": [],
+                "totalDays": 0,
+            }
+        city["visits"].append(len(js_visits))
+        # Each visit counts at least one day, even a day trip or one with a missing end
+        city["totalDays"] += days if days and days > 0 else 1
 
-        duration = _human_duration(enter_str, exit_str)
-        month = _month_year(enter_str) if enter else _month_year(exit_str)
-        country = CITY_TO_COUNTRY.get(v.city, "")
+        if sort_date:
+            year = sort_date.year
+            if min_year is None or year < min_year:
+                min_year = year
+            if max_year is None or year > max_year:
+                max_year = year
 
         js_visits.append({
-            "city": v.city,
+            "city": city_html,
             "country": country,
             "lat": coords[0],
             "lng": coords[1],
@@ -409,11 +459,10 @@ def format_travel_map_html(visits: List[CityVisit], path: Path):
             "sort": sort_date.isoformat() if sort_date else "",
         })
 
-    visits_json = json.dumps(js_visits, ensure_ascii=False)
+    map_data = {"visits": js_visits, "cities": list(cities.values())}
+    map_json = dumps(map_data).decode("utf-8")
 
-    # Compute year range from visit data
-    years = [int(v["sort"][:4]) for v in js_visits if v.get("sort") and len(v["sort"]) >= 4]
-    year_range = f"{min(years)} to {max(years)}" if years else "all time"
+    year_range = f"{min_year} to {max_year}" if min_year is not None else "all time"
 
     html = f"""<!DOCTYPE html>
 <html lang="en">
@@ -576,7 +625,9 @@ def format_travel_map_html(visits: List[CityVisit], path: Path):
 
 <script>
 (function() {{
-  var visits = {visits_json};
+  var data = {map_json};
+  var visits = data.visits;
+  var cities = data.cities;
 
   // --- Map ---
   var map = L.map('map').setView([38, -20], 3);
@@ -585,32 +636,16 @@ def format_travel_map_html(visits: List[CityVisit], path: Path):
     maxZoom: 18
   }}).addTo(map);
 
-  // Dedupe cities for pins (show all visits in popup) and compute total days
-  var cityMap = {{}};
-  visits.forEach(function(v) {{
-    if (!cityMap[v.city]) {{
-      cityMap[v.city] = {{ lat: v.lat, lng: v.lng, country: v.country, visits: [], totalDays: 0 }};
-    }}
-    cityMap[v.city].visits.push(v);
-    if (v.enter && v.exit) {{
-      var d = Math.round((new Date(v.exit) - new Date(v.enter)) / 86400000);
-      if (d > 0) cityMap[v.city].totalDays += d;
-      else cityMap[v.city].totalDays += 1;
-    }} else {{
-      cityMap[v.city].totalDays += 1;
-    }}
-  }});
-
-  // Add pins with radius scaled by total days
+  // Add pins (one per city, all its visits in the popup) with radius scaled by total days
   var markers = [];
-  Object.keys(cityMap).forEach(function(city) {{
-    var c = cityMap[city];
+  cities.forEach(function(c) {{
     var visitCount = c.visits.length;
     var totalDays = c.totalDays;
-    var popupLines = '<strong>' + city + '</strong>';
+    var popupLines = '<strong>' + c.city + '</strong>';
     if (c.country) popupLines += '<br>' + c.country;
     popupLines += '<br>' + visitCount + (visitCount === 1 ? ' visit' : ' visits') + ', ' + totalDays + ' days total';
-    c.visits.forEach(function(v) {{
+    c.visits.forEach(function(i) {{
+      var v = visits[i];
       var line = '<br>' + v.month;
       if (v.duration) line += ' (' + v.duration + ')';
       if (v.hotel) line += '<br><em>' + v.hotel + '</em>';
@@ -647,8 +682,8 @@ def format_travel_map_html(visits: List[CityVisit], path: Path):
   }}
 
   // --- Shared data ---
-  var cityDaysList = Object.keys(cityMap).map(function(city) {{
-    return {{ city: city, days: cityMap[city].totalDays, visits: cityMap[city].visits.length, country: cityMap[city].country }};
+  var cityDaysList = cities.map(function(c) {{
+    return {{ city: c.city, days: c.totalDays, visits: c.visits.length, country: c.country }};
   }}).sort(function(a, b) {{ return b.days - a.days; }});
 
   function humanDays(d) {{
@@ -761,4 +796,4 @@ def format_travel_map_html(visits: List[CityVisit], path: Path):
 </body>
 </html>"""
 
-    path.write_text(html, encoding="utf-8")
+    path.write_bytes(html.encode("utf-8"))
@@ -4,10 +4,17 @@ import mailbox
 import os
 import re
 import sys
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple
 
-from travel_itinerary.config import BATCH_SIZE, DEFAULT_TRAVELER_NAME, MBOX_PATH
+from travel_itinerary.config import (
+    BATCH_SIZE,
+    DEFAULT_TRAVELER_NAME,
+    GAP_THRESHOLD_DAYS,
+    MBOX_PATH,
+)
 from travel_itinerary.models import (
     CityVisit,
     EventType,
@@ -18,7 +25,8 @@ from travel_itinerary.models import (
 )
 from travel_itinerary.extract.email_parser import email_hash, extract_content
 from travel_itinerary.extract.cache import ExtractionCache
-from travel_itinerary.extract.llm_extractor import extract_with_fallback
+from travel_itinerary.extract.llm_extractor import extract_batch
+from travel_itinerary.extract.mbox_reader import iter_mbox, iter_mbox_raw, split_mbox
 from travel_itinerary.normalize.city_resolver import resolve_city
 from travel_itinerary.normalize.date_parser import parse_date, parse_date_with_context
 from travel_itinerary.normalize.iata import iata_to_city
@@ -28,7 +36,7 @@ from travel_itinerary.assemble.gap_detector import detect_gaps
 
 # Import the existing classifier
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
-from travel_sorter import TravelClassifier, EmailParser as LegacyEmailParser  # noqa: E402
+from travel_sorter import BLOCK_DOMAINS, TravelClassifier, EmailParser as LegacyEmailParser  # noqa: E402
 
 
 # Categories from travel_sorter that represent actual bookings (not marketing/admin)
@@ -41,31 +49,99 @@ _BOOKING_CATEGORIES = {
     "TOUR_ACTIVITY_TICKET",
 }
 
+# Subjects of cancellation/refund emails, whose bookings shouldn't become trips.
+# Every alternative contains "cancel" or "refund", which _is_cancellation
+# checks first so most subjects never enter the regex engine.
+_CANCELLATION_RE = re.compile(
+    r'cancel(?:led|lation|ed)|refund(?:ed)?|trip\s+cancelled|'
+    r'successfully\s+cancelled|your\s+(?:trip|booking|reservation)\s+(?:has\s+been\s+)?cancel',
+    re.I,
+)
 
-def _classify_emails(mbox_path: str) -> Tuple[List[Dict], List[Dict]]:
-    """Run the existing classifier. Returns (travel_emails, all_emails)."""
-    classifier = TravelClassifier()
-    mb = mailbox.mbox(mbox_path)
 
-    travel_emails = []
-    all_emails = []
+def _is_cancellation(subject: str) -> bool:
+    lowered = subject.lower()
+    if "cancel" not in lowered and "refund" not in lowered:
+        return False
+    return _CANCELLATION_RE.search(subject) is not None
 
-    for msg in mb:
-        try:
-            content = extract_content(msg)
-            all_emails.append(content)
 
-            # Use the legacy classifier
-            legacy_content = LegacyEmailParser.extract_content(msg)
-            result = classifier.classify(legacy_content)
+# Byte ranges of the mbox per worker when classifying in parallel; more than
+# one so a range full of large messages doesn't leave other workers idle
+_RANGES_PER_WORKER = 4
 
-            if result["category"] in _BOOKING_CATEGORIES:
-                content["_category"] = result["category"]
-                content["_confidence"] = result["confidence"]
-                travel_emails.append(content)
-        except Exception:
-            continue
+_worker_classifier: Optional[TravelClassifier] = None
+
+_SENDER_DOMAIN_RE = re.compile(r'@([\w.-]+)')
+
+
+def _is_blocked(msg: mailbox.Message, classifier: TravelClassifier) -> bool:
+    """Header-only form of the classifier's blocklist check.
+
+    A blocked sender domain or subject is NON_TRAVEL whatever the body
+    says, so those messages can skip the legacy parser's body decode and
+    HTML pass. Mirrors the first check in TravelClassifier.classify.
+    """
+    subj_norm = " ".join(LegacyEmailParser.decode_str(msg.get("subject", "")).lower().split())
+    m = _SENDER_DOMAIN_RE.search(LegacyEmailParser.decode_str(msg.get("from", "")).lower())
+    domain = m.group(1) if m else ""
+    return (any(d in domain for d in BLOCK_DOMAINS)
+            or any(r.search(subj_norm) for r in classifier.block_subjects))
+
+
+def _classify_message(msg: mailbox.Message, classifier: TravelClassifier) -> Optional[Dict]:
+    """Extract one email, tagged with _category if it's a booking. None if unreadable."""
+    try:
+        content = extract_content(msg)
+    except Exception:
+        return None
+
+    try:
+        if _is_blocked(msg, classifier):
+            return content
+        # Use the legacy classifier
+        legacy_content = LegacyEmailParser.extract_content(msg)
+        result = classifier.classify(legacy_content)
+    except Exception:
+        return content
+
+    if result["category"] in _BOOKING_CATEGORIES:
+        content["_category"] = result["category"]
+        content["_confidence"] = result["confidence"]
+    return content
+
+
+def _init_worker():
+    global _worker_classifier
+    _worker_classifier = TravelClassifier()
+
+
+def _classify_range(mbox_path: str, start: int, end: int) -> List[Optional[Dict]]:
+    """Read and classify the messages in one byte range of the mbox (worker side)."""
+    return [
+        _classify_message(mailbox.mboxMessage(raw), _worker_classifier)
+        for _, raw in iter_mbox_raw(mbox_path, start, end)
+    ]
+
+
+def _classify_emails(mbox_path: str, workers: int = 1) -> Tuple[List[Dict], List[Dict]]:
+    """Run the existing classifier. Returns (travel_emails, all_emails).
 
+    With workers > 1, the mbox is split into byte ranges that each worker
+    process reads, parses and classifies itself, so raw messages never pass
+    through the parent; results keep mbox order either way.
+    """
+    if workers > 1:
+        starts, ends = zip(*split_mbox(mbox_path, workers * _RANGES_PER_WORKER))
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+            chunks = pool.map(_classify_range, repeat(mbox_path), starts, ends)
+            results = [content for chunk in chunks for content in chunk]
+    else:
+        classifier = TravelClassifier()
+        results = [_classify_message(msg, classifier) for msg in iter_mbox(mbox_path)]
+
+    all_emails = [content for content in results if content is not None]
+    travel_emails = [content for content in all_emails if "_category" in content]
     return travel_emails, all_emails
 
 
@@ -146,31 +222,33 @@ _FIRST_NAME_VARIANTS = {
 }
 
 
-def _normalize_first(name: str) -> set[str]:
+# Every recognized spelling, mapped to the full set of its variants
+_FIRST_NAME_LOOKUP = {
+    v: frozenset(variants) for variants in _FIRST_NAME_VARIANTS.values() for v in variants
+}
+
+
+def _normalize_first(name: str) -> frozenset[str]:
     """Return a set of recognized variants for a first name."""
     low = name.lower()
-    for canonical, variants in _FIRST_NAME_VARIANTS.items():
-        if low in variants:
-            return variants
-    return {low}
+    return _FIRST_NAME_LOOKUP.get(low) or frozenset((low,))
+
 
+def _is_traveler_match(event: TravelEvent, target_last: str, target_first_variants: frozenset[str]) -> bool:
+    """Check if event belongs to the traveler (first + last name match).
 
-def _is_traveler_match(event: TravelEvent, traveler_name: str) -> bool:
-    """Check if event belongs to the given traveler (first + last name match)."""
+    The target name is split once by the caller, since it is the same for
+    every event.
+    """
     name = event.traveler_name.strip()
     if not name:
         return True  # no traveler info → assume it's ours (backward compat with cache)
     event_parts = name.lower().split()
-    target_parts = traveler_name.lower().split()
-    if not event_parts or not target_parts:
-        return True
     # Last name must match
-    if event_parts[-1] != target_parts[-1]:
+    if event_parts[-1] != target_last:
         return False
     # First name must match (with variant handling for Matt/Matthew)
-    event_first_variants = _normalize_first(event_parts[0])
-    target_first_variants = _normalize_first(target_parts[0])
-    return bool(event_first_variants & target_first_variants)
+    return not _normalize_first(event_parts[0]).isdisjoint(target_first_variants)
 
 
 def run_pipeline(
@@ -178,7 +256,8 @@ def run_pipeline(
     skip_classify: bool = False,
     verbose: bool = True,
     traveler_name: Optional[str] = None,
-) -> Tuple[List[CityVisit], List[Gap], List[TravelEvent]]:
+    workers: int = 1,
+) -> Tuple[List[CityVisit], List[Gap], List[TravelEvent], int]:
     """Run the full pipeline end to end.
 
     Args:
@@ -186,9 +265,12 @@ def run_pipeline(
         skip_classify: If True, extract from ALL emails (not just travel-classified).
         verbose: Print progress to stderr.
         traveler_name: Filter events to this traveler. Defaults to config DEFAULT_TRAVELER_NAME.
+        workers: Processes used to parse and classify the mbox (1 = in-process).
 
     Returns:
-        (city_visits, gaps, deduped_events)
+        (city_visits, gaps, deduped_events, extraction_errors), where
+        extraction_errors counts emails whose LLM extraction failed (they
+        aren't cached, so a later run retries them)
     """
     traveler_name = traveler_name or DEFAULT_TRAVELER_NAME
     mbox_path = mbox_path or MBOX_PATH
@@ -200,53 +282,70 @@ def run_pipeline(
 
     # Step 1: Classify
     log(f"Loading mbox: {mbox_path}")
-    travel_emails, all_emails = _classify_emails(mbox_path)
+    travel_emails, all_emails = _classify_emails(mbox_path, workers=workers)
     log(f"  Total emails: {len(all_emails)}")
     log(f"  Travel-classified: {len(travel_emails)}")
 
     emails_to_extract = all_emails if skip_classify else travel_emails
 
     # Filter out cancellation emails
-    cancellation_patterns = re.compile(
-        r'cancel(?:led|lation|ed)|refund(?:ed)?|trip\s+cancelled|'
-        r'successfully\s+cancelled|your\s+(?:trip|booking|reservation)\s+(?:has\s+been\s+)?cancel',
-        re.I,
-    )
     before_cancel_filter = len(emails_to_extract)
+    is_cancellation = _is_cancellation
     emails_to_extract = [
         e for e in emails_to_extract
-        if not cancellation_patterns.search(e.get("subject", ""))
+        if not is_cancellation(e.get("subject", ""))
     ]
     cancelled_count = before_cancel_filter - len(emails_to_extract)
     if cancelled_count:
         log(f"  Filtered out {cancelled_count} cancellation emails")
 
-    # Step 2: Extract via LLM (with caching)
-    events: List[TravelEvent] = []
-    api_calls = 0
-    cache_hits = 0
-
+    # Step 2: Extract via LLM (with caching). Cache hits are served inline;
+    # misses go to a thread pool so the API round-trips overlap.
+    raws: List[Optional[Dict]] = [None] * len(emails_to_extract)
+    misses: List[Tuple[int, str]] = []
     for i, email_content in enumerate(emails_to_extract):
-        if verbose and (i + 1) % BATCH_SIZE == 0:
-            log(f"  Extracting {i + 1}/{len(emails_to_extract)} (API: {api_calls}, cached: {cache_hits})")
-
         eh = email_hash(email_content)
-
-        # Check cache
         cached = cache.get(eh)
         if cached:
-            cache_hits += 1
-            raw = cached
+            raws[i] = cached
         else:
-            try:
-                raw = extract_with_fallback(email_content)
-                cache.put(eh, raw)
-                api_calls += 1
-            except Exception as e:
-                log(f"  ERROR extracting: {e}")
-                continue
-
-        # Normalize
+            misses.append((i, eh))
+    cache_hits = len(emails_to_extract) - len(misses)
+    api_calls = 0
+    errors = 0
+
+    def store(j: int, raw: Dict):
+        nonlocal api_calls
+        i, eh = misses[j]
+        # Cached as each result lands (extract_batch calls back on this thread;
+        # the SQLite connection isn't shared with the workers)
+        cache.put(eh, raw)
+        api_calls += 1
+        raws[i] = raw
+
+    def report_error(j: int, e: Exception):
+        nonlocal errors
+        errors += 1
+        log(f"  ERROR extracting: {e}")
+
+    def progress(done: int, total: int):
+        if verbose and done % BATCH_SIZE == 0:
+            log(f"  Extracting {done}/{total} (API: {api_calls}, cached: {cache_hits})")
+
+    if misses:
+        extract_batch(
+            [emails_to_extract[i] for i, _ in misses],
+            progress_callback=progress,
+            on_result=store,
+            on_error=report_error,
+        )
+    cache.close()
+
+    # Normalize in mbox order, whatever order the extractions finished in
+    events: List[TravelEvent] = []
+    for email_content, raw in zip(emails_to_extract, raws):
+        if raw is None:
+            continue
         event = _normalize_extraction(raw, email_content.get("date", ""))
         if event:
             event.source_email_id = email_content.get("message_id", "")
@@ -257,7 +356,11 @@ def run_pipeline(
 
     # Step 3: Filter by traveler name
     before_filter = len(events)
-    events = [e for e in events if _is_traveler_match(e, traveler_name)]
+    target_parts = traveler_name.lower().split()
+    if target_parts:
+        target_last = target_parts[-1]
+        target_first_variants = _normalize_first(target_parts[0])
+        events = [e for e in events if _is_traveler_match(e, target_last, target_first_variants)]
     filtered_count = before_filter - len(events)
     if filtered_count:
         log(f"  Filtered out {filtered_count} events for other travelers (keeping: {traveler_name})")
@@ -272,6 +375,6 @@ def run_pipeline(
 
     # Step 6: Detect gaps
     visits, gaps = detect_gaps(visits)
-    log(f"  Detected {len(gaps)} gaps (>{__import__('travel_itinerary.config', fromlist=['GAP_THRESHOLD_DAYS']).GAP_THRESHOLD_DAYS} days)")
+    log(f"  Detected {len(gaps)} gaps (>{GAP_THRESHOLD_DAYS} days)")
 
-    return visits, gaps, deduped
+    return visits, gaps, deduped, errors